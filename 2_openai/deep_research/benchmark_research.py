@@ -0,0 +1,157 @@
+"""
+Time from query to finished report, for the research flow as it was (plan, then every search,
+then write) and for ResearchManager's pipeline, where each search starts as soon as the planner
+has streamed it out and the report's outline is drafted while the searches finish.
+
+Every agent runs on a local stub model that streams canned output at a fixed rate after a
+first-token delay; searches also take a random 1-3 seconds for the web search itself.
+
+    uv run benchmark_research.py --runs 3 --tokens-per-second 80
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from agents import Model, ModelResponse, Runner, Usage, set_tracing_disabled
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+from outline_agent import outline_agent
+from planner_agent import HOW_MANY_SEARCHES, WebSearchItem, WebSearchPlan, planner_agent
+from research_manager import ResearchManager
+from search_agent import search_agent
+from writer_agent import ReportData, writer_agent
+
+QUERY = "Latest AI Agent frameworks in 2025"
+WORDS = "agents frameworks orchestration tools memory evaluation latency cost adoption enterprise".split()
+
+
+def words(count: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(count))
+
+
+class StubModel(Model):
+    """ Streams the text from make_output at tokens_per_second (4 characters a token) after a first-token delay """
+
+    def __init__(self, make_output, first_token: float, tokens_per_second: float, extra_seconds=lambda: 0.0):
+        self.make_output = make_output
+        self.first_token = first_token
+        self.tokens_per_second = tokens_per_second
+        self.extra_seconds = extra_seconds
+
+    def _message(self, text: str) -> ResponseOutputMessage:
+        content = ResponseOutputText(type="output_text", text=text, annotations=[])
+        return ResponseOutputMessage(id="stub", type="message", role="assistant", status="completed", content=[content])
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        text = self.make_output()
+        await asyncio.sleep(self.extra_seconds() + self.first_token + len(text) / 4 / self.tokens_per_second)
+        return ModelResponse(output=[self._message(text)], usage=Usage(), response_id=None)
+
+    async def stream_response(self, *args, **kwargs):
+        text = self.make_output()
+        await asyncio.sleep(self.extra_seconds() + self.first_token)
+        chunk = 32
+        for sequence, start in enumerate(range(0, len(text), chunk)):
+            await asyncio.sleep(chunk / 4 / self.tokens_per_second)
+            yield ResponseTextDeltaEvent(
+                type="response.output_text.delta",
+                item_id="stub",
+                output_index=0,
+                content_index=0,
+                delta=text[start : start + chunk],
+                sequence_number=sequence,
+            )
+        response = Response(
+            id="stub",
+            created_at=time.time(),
+            model="stub",
+            object="response",
+            output=[self._message(text)],
+            parallel_tool_calls=False,
+            tool_choice="auto",
+            tools=[],
+        )
+        yield ResponseCompletedEvent(type="response.completed", response=response, sequence_number=sequence + 1)
+
+
+def use_stub_models(first_token: float, tokens_per_second: float) -> None:
+    def plan() -> str:
+        searches = [WebSearchItem(reason=words(40), query=words(6)) for _ in range(HOW_MANY_SEARCHES)]
+        return WebSearchPlan(searches=searches).model_dump_json()
+
+    def report() -> str:
+        report = ReportData(short_summary=words(50), markdown_report=words(1000), follow_up_questions=[words(12)] * 3)
+        return report.model_dump_json()
+
+    planner_agent.model = StubModel(plan, first_token, tokens_per_second)
+    search_agent.model = StubModel(lambda: words(250), first_token, tokens_per_second, lambda: random.uniform(1, 3))
+    outline_agent.model = StubModel(lambda: words(150), first_token, tokens_per_second)
+    writer_agent.model = StubModel(report, first_token, tokens_per_second)
+
+
+class TimedResearchManager(ResearchManager):
+    def __init__(self, marks: dict):
+        self.marks = marks
+
+    async def search(self, item: WebSearchItem) -> str | None:
+        self.marks.setdefault("first search", time.perf_counter())
+        return await super().search(item)
+
+
+async def sequential(query: str, marks: dict) -> ReportData:
+    """ The flow before the pipeline: the whole plan, then all the searches, then the report """
+    plan = (await Runner.run(planner_agent, f"Query: {query}")).final_output_as(WebSearchPlan)
+    marks["first search"] = time.perf_counter()
+    searches = [
+        Runner.run(search_agent, f"Search term: {item.query}\nReason for searching: {item.reason}")
+        for item in plan.searches
+    ]
+    results = [str(result.final_output) for result in await asyncio.gather(*searches)]
+    marks["searches done"] = time.perf_counter()
+    input = f"Original query: {query}\nSummarized search results: {results}"
+    return (await Runner.run(writer_agent, input)).final_output_as(ReportData)
+
+
+async def pipelined(query: str, marks: dict) -> ReportData:
+    """ ResearchManager's stages up to the finished report, leaving out the email """
+    manager = TimedResearchManager(marks)
+    search_plan, search_tasks = await manager.plan_searches(query)
+    search_results, outline = await manager.perform_searches(query, search_plan, search_tasks)
+    marks["searches done"] = time.perf_counter()
+    return await manager.write_report(query, search_results, outline)
+
+
+async def main(runs: int, first_token: float, tokens_per_second: float):
+    set_tracing_disabled(True)
+    use_stub_models(first_token, tokens_per_second)
+    timings = {"sequential": [], "pipelined": []}
+    for run in range(runs):
+        for name, flow in [("sequential", sequential), ("pipelined", pipelined)]:
+            random.seed(run)
+            marks = {}
+            start = time.perf_counter()
+            await flow(QUERY, marks)
+            end = time.perf_counter()
+            timings[name].append((marks["first search"] - start, marks["searches done"] - start, end - start))
+    print(f"\n{'':<12} {'first search (s)':>17} {'searches done (s)':>18} {'time to report (s)':>19}")
+    for name, runs_timings in timings.items():
+        first, done, report = (statistics.mean(column) for column in zip(*runs_timings))
+        print(f"{name:<12} {first:>17.2f} {done:>18.2f} {report:>19.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--first-token", type=float, default=0.5, help="seconds before a model starts answering")
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.first_token, args.tokens_per_second))
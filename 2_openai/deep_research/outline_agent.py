@@ -0,0 +1,14 @@
+from agents import Agent
+
+INSTRUCTIONS = (
+    "You are a senior researcher planning a report for a research query. You will be given the query, "
+    "the web searches planned to answer it, and the first of their results; the rest are still coming in. "
+    "Write an outline for the report: its sections in order, with a line or two on what each should cover. "
+    "Allow for the searches that haven't returned yet. Output only the outline, in markdown."
+)
+
+outline_agent = Agent(
+    name="OutlineAgent",
+    instructions=INSTRUCTIONS,
+    model="gpt-4o-mini",
+)
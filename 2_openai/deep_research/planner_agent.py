@@ -14,7 +14,46 @@ class WebSearchItem(BaseModel):
 
 class WebSearchPlan(BaseModel):
     searches: list[WebSearchItem] = Field(description="A list of web searches to perform to best answer the query.")
-    
+
+
+class SearchItemParser:
+    """ Picks each WebSearchItem out of the planner's streamed JSON as soon as it is complete """
+
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start = 0
+
+    def feed(self, delta: str) -> list[WebSearchItem]:
+        self.text += delta
+        items = []
+        while self.position < len(self.text):
+            char = self.text[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                # Depth 1 is the plan, 2 its list of searches, and 3 each search in it
+                if char == "{" and self.depth == 3:
+                    self.item_start = self.position
+            elif char in "}]":
+                if char == "}" and self.depth == 3:
+                    items.append(WebSearchItem.model_validate_json(self.text[self.item_start : self.position + 1]))
+                self.depth -= 1
+            self.position += 1
+        return items
+
+
 planner_agent = Agent(
     name="PlannerAgent",
     instructions=INSTRUCTIONS,
@@ -1,6 +1,8 @@
 from agents import Runner, trace, gen_trace_id
+from openai.types.responses import ResponseTextDeltaEvent
 from search_agent import search_agent
-from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
+from planner_agent import planner_agent, SearchItemParser, WebSearchItem, WebSearchPlan
+from outline_agent import outline_agent
 from writer_agent import writer_agent, ReportData
 from email_agent import email_agent
 import asyncio
@@ -14,41 +16,56 @@ class ResearchManager:
             print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}")
             yield f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}"
             print("Starting research...")
-            search_plan = await self.plan_searches(query)
-            yield "Searches planned, starting to search..."     
-            search_results = await self.perform_searches(search_plan)
+            search_plan, search_tasks = await self.plan_searches(query)
+            yield "Searches planned, searching..."
+            search_results, outline = await self.perform_searches(query, search_plan, search_tasks)
             yield "Searches complete, writing report..."
-            report = await self.write_report(query, search_results)
+            report = await self.write_report(query, search_results, outline)
             yield "Report written, sending email..."
             await self.send_email(report)
             yield "Email sent, research complete"
             yield report.markdown_report
         
 
-    async def plan_searches(self, query: str) -> WebSearchPlan:
-        """ Plan the searches to perform for the query """
+    async def plan_searches(self, query: str) -> tuple[WebSearchPlan, list[asyncio.Task]]:
+        """ Plan the searches to perform for the query, starting each search as soon as the planner has written it """
         print("Planning searches...")
-        result = await Runner.run(
+        result = Runner.run_streamed(
             planner_agent,
             f"Query: {query}",
         )
-        print(f"Will perform {len(result.final_output.searches)} searches")
-        return result.final_output_as(WebSearchPlan)
+        parser = SearchItemParser()
+        tasks = []
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                for item in parser.feed(event.data.delta):
+                    print(f"Starting search for {item.query}")
+                    tasks.append(asyncio.create_task(self.search(item)))
+        search_plan = result.final_output_as(WebSearchPlan)
+        # In case any searches couldn't be picked out of the stream
+        for item in search_plan.searches[len(tasks):]:
+            tasks.append(asyncio.create_task(self.search(item)))
+        print(f"Will perform {len(search_plan.searches)} searches")
+        return search_plan, tasks
 
-    async def perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
-        """ Perform the searches to perform for the query """
+    async def perform_searches(
+        self, query: str, search_plan: WebSearchPlan, tasks: list[asyncio.Task]
+    ) -> tuple[list[str], str | None]:
+        """ Wait for the searches, drafting the report's outline from the first result while the rest finish """
         print("Searching...")
         num_completed = 0
-        tasks = [asyncio.create_task(self.search(item)) for item in search_plan.searches]
         results = []
+        outline = None
         for task in asyncio.as_completed(tasks):
             result = await task
             if result is not None:
                 results.append(result)
+                if outline is None:
+                    outline = asyncio.create_task(self.outline_report(query, search_plan, result))
             num_completed += 1
             print(f"Searching... {num_completed}/{len(tasks)} completed")
         print("Finished searching")
-        return results
+        return results, await outline if outline else None
 
     async def search(self, item: WebSearchItem) -> str | None:
         """ Perform a search for the query """
@@ -62,10 +79,26 @@ class ResearchManager:
         except Exception:
             return None
 
-    async def write_report(self, query: str, search_results: list[str]) -> ReportData:
+    async def outline_report(self, query: str, search_plan: WebSearchPlan, first_result: str) -> str | None:
+        """ Outline the report from the search plan and the first search result """
+        searches = "\n".join(f"- {item.query}: {item.reason}" for item in search_plan.searches)
+        input = f"Original query: {query}\nPlanned searches:\n{searches}\nFirst search result: {first_result}"
+        try:
+            result = await Runner.run(
+                outline_agent,
+                input,
+            )
+            print("Finished outlining report")
+            return str(result.final_output)
+        except Exception:
+            return None
+
+    async def write_report(self, query: str, search_results: list[str], outline: str | None = None) -> ReportData:
         """ Write the report for the query """
         print("Thinking about report...")
         input = f"Original query: {query}\nSummarized search results: {search_results}"
+        if outline:
+            input += f"\nOutline: {outline}"
         result = await Runner.run(
             writer_agent,
             input,
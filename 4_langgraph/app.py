@@ -9,11 +9,13 @@ async def setup():
 
 
 async def process_message(sidekick, message, success_criteria, history):
-    results = await sidekick.run_superstep(message, success_criteria, history)
-    return results, sidekick
+    async for results in sidekick.stream_superstep(message, success_criteria, history):
+        yield results, sidekick
 
 
-async def reset():
+async def reset(sidekick):
+    if sidekick:
+        await sidekick.close()
     new_sidekick = Sidekick()
     await new_sidekick.setup()
     return "", "", None, new_sidekick
@@ -47,15 +49,24 @@ with gr.Blocks(title="Sidekick", theme=gr.themes.Default(primary_hue="emerald"))
 
     ui.load(setup, [], [sidekick])
     message.submit(
-        process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick]
+        process_message,
+        [sidekick, message, success_criteria, chatbot],
+        [chatbot, sidekick],
+        concurrency_limit=None,
     )
     success_criteria.submit(
-        process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick]
+        process_message,
+        [sidekick, message, success_criteria, chatbot],
+        [chatbot, sidekick],
+        concurrency_limit=None,
     )
     go_button.click(
-        process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick]
+        process_message,
+        [sidekick, message, success_criteria, chatbot],
+        [chatbot, sidekick],
+        concurrency_limit=None,
     )
-    reset_button.click(reset, [], [message, success_criteria, chatbot, sidekick])
+    reset_button.click(reset, [sidekick], [message, success_criteria, chatbot, sidekick])
 
 
 ui.launch(inbrowser=True)
@@ -0,0 +1,134 @@
+"""
+Measure Sidekick's checkpoint memory: RAM held per session, database size per session,
+and how long each checkpoint write takes, as sessions run turn after turn.
+
+Each turn the stub worker calls a stub tool that returns a large page of text, then
+replies, and the stub evaluator accepts the reply, so history grows the way it does
+when the Sidekick browses. Three setups are compared:
+
+  memory         the in-RAM MemorySaver with no compaction, as Sidekick used to run
+  sqlite         the AsyncSqliteSaver on a scratch database, with no compaction
+  sqlite+compact the AsyncSqliteSaver with history compaction and checkpoint pruning
+
+    uv run benchmark_memory.py --sessions 20 --turns 10
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SERPER_API_KEY", "stub")
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+
+import sidekick_memory
+from sidekick import EvaluatorOutput, Sidekick
+
+PAGE = "All work and no play makes Jack a dull boy. " * 500
+
+
+@tool
+def fetch_page(url: str) -> str:
+    """Fetch a web page"""
+    return PAGE
+
+
+class StubWorker(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "stub-worker"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if isinstance(messages[-1], HumanMessage):
+            call = {"name": "fetch_page", "args": {"url": "https://example.com"}, "id": f"call_{len(messages)}"}
+            message = AIMessage(content="", tool_calls=[call])
+        else:
+            message = AIMessage(content="The page says Jack needs a holiday. " * 20)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._generate(messages)
+
+
+async def run(setup: str, sessions: int, turns: int, db_path: str) -> dict:
+    sidekick_memory.MEMORY_DB = "" if setup == "memory" else db_path
+    if "compact" not in setup:
+        sidekick_memory.HISTORY_TOKEN_BUDGET = 10**9
+        sidekick_memory.TOOL_OUTPUT_CHARS = 10**9
+        sidekick_memory.CHECKPOINTS_KEPT = 10**9
+    sidekick_memory._checkpointer = None
+    checkpointer = await sidekick_memory.get_checkpointer()
+
+    write_ms = []
+    aput = checkpointer.aput
+
+    async def timed_aput(*args, **kwargs):
+        start = time.perf_counter()
+        result = await aput(*args, **kwargs)
+        write_ms.append((time.perf_counter() - start) * 1000)
+        return result
+
+    checkpointer.aput = timed_aput
+
+    verdict = EvaluatorOutput(feedback="Looks good", success_criteria_met=True, user_input_needed=False)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sidekicks = []
+    for _ in range(sessions):
+        sidekick = Sidekick()
+        sidekick.tools = [fetch_page]
+        sidekick.worker_llm_with_tools = StubWorker()
+        sidekick.evaluator_llm_with_output = RunnableLambda(lambda messages: verdict)
+        await sidekick.build_graph()
+        sidekicks.append(sidekick)
+
+    history = [[] for _ in sidekicks]
+    for turn in range(turns):
+        for i, sidekick in enumerate(sidekicks):
+            history[i] = await sidekick.run_superstep(f"Read the page again, turn {turn}", "", history[i])
+    gc.collect()
+    ram = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    state = await sidekicks[0].graph.aget_state({"configurable": {"thread_id": sidekicks[0].sidekick_id}})
+    if setup != "memory":
+        await checkpointer.conn.close()
+    return {
+        "ram_kb": ram / sessions / 1024,
+        "db_kb": os.path.getsize(db_path) / sessions / 1024 if setup != "memory" else 0,
+        "messages": len(state.values["messages"]),
+        "p50": statistics.median(write_ms),
+        "p99": sorted(write_ms)[int(len(write_ms) * 0.99)],
+    }
+
+
+async def main(sessions: int, turns: int):
+    print(f"{sessions} sessions, {turns} turns each")
+    print(f"{'setup':<15} {'RAM KB/session':>15} {'DB KB/session':>14} {'messages':>9} {'write p50 ms':>13} {'p99 ms':>7}")
+    defaults = (sidekick_memory.HISTORY_TOKEN_BUDGET, sidekick_memory.TOOL_OUTPUT_CHARS, sidekick_memory.CHECKPOINTS_KEPT)
+    for setup in ["memory", "sqlite", "sqlite+compact"]:
+        sidekick_memory.HISTORY_TOKEN_BUDGET, sidekick_memory.TOOL_OUTPUT_CHARS, sidekick_memory.CHECKPOINTS_KEPT = defaults
+        with tempfile.TemporaryDirectory() as tmp:
+            result = await run(setup, sessions, turns, os.path.join(tmp, "memory.db"))
+        print(
+            f"{setup:<15} {result['ram_kb']:>15,.0f} {result['db_kb']:>14,.0f} {result['messages']:>9} "
+            f"{result['p50']:>13.2f} {result['p99']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.turns))
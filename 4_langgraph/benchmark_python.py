@@ -0,0 +1,88 @@
+"""
+Compare the Sidekick's Python tool running snippets in the app's own process, as
+PythonREPLTool does, with the pool of worker processes in sidekick_python.py.
+
+  throughput   many short snippets from several sessions at once
+  heavy        short snippets from one session while another runs a CPU-heavy snippet,
+               which in-process holds the GIL and slows everything else in the app
+
+    uv run benchmark_python.py --snippets 500 --sessions 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_experimental.tools import PythonREPLTool
+
+from sidekick_python import python_pool
+
+HEAVY = "total = 0\nfor i in range(30_000_000):\n    total += i\nprint(total)"
+
+
+async def with_loop_lag(coroutine):
+    """Run the coroutine, returning its result and the worst event loop delay seen meanwhile."""
+    worst = 0.0
+    done = False
+
+    async def watch():
+        nonlocal worst
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst = max(worst, time.perf_counter() - start - 0.01)
+
+    watcher = asyncio.create_task(watch())
+    result = await coroutine
+    done = True
+    await watcher
+    return result, worst
+
+
+async def throughput(run, snippets: int, sessions: int) -> float:
+    async def session(index: int):
+        for i in range(index, snippets, sessions):
+            await run(f"s{index}", f"x = {i}\nprint(x * 2)")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[session(i) for i in range(sessions)])
+    return snippets / (time.perf_counter() - start)
+
+
+async def light_during_heavy(run) -> float:
+    """Median latency of short snippets from one session while another session runs HEAVY."""
+    heavy = asyncio.create_task(run("heavy", HEAVY))
+    await asyncio.sleep(0.05)
+    timings = []
+    for i in range(20):
+        start = time.perf_counter()
+        await run("light", f"print({i} + 1)")
+        timings.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    await heavy
+    return statistics.median(timings) * 1000
+
+
+async def main(snippets: int, sessions: int):
+    repl = PythonREPLTool()
+
+    async def in_process(session_id: str, code: str) -> str:
+        # One REPL for all sessions, as when every Sidekick shares the process
+        return await repl.arun(code)
+
+    python_pool.start()
+    print(f"{'':<12} {'snippets/s':>11} {'light p50 ms during heavy':>27} {'worst loop lag ms':>18}")
+    for name, run in [("in-process", in_process), ("worker pool", python_pool.arun)]:
+        rate = await throughput(run, snippets, sessions)
+        light_ms, lag = await with_loop_lag(light_during_heavy(run))
+        print(f"{name:<12} {rate:>11.0f} {light_ms:>27.1f} {lag * 1000:>18.1f}")
+    python_pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snippets", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.snippets, args.sessions))
@@ -0,0 +1,146 @@
+"""
+Load test for the Sidekick graph: how many concurrent sessions one process can serve.
+
+The worker and evaluator LLMs are replaced by a local stub that takes --latency seconds
+per call, so no API calls are made and no browser is started. Three ways of calling the
+model are compared:
+
+  sync      the nodes as they were before they were made async: plain functions calling
+            invoke(), which LangGraph runs in the default executor, so every LLM round-trip
+            holds one of its threads
+  blocking  async nodes that call invoke() anyway, blocking the event loop for every
+            LLM round-trip, so sessions are served one call at a time
+  async     the nodes as they are, awaiting ainvoke(), with the reply streamed
+
+    uv run benchmark_sidekick.py --sessions 1 8 32 128 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SERPER_API_KEY", "stub")
+os.environ.setdefault("SIDEKICK_MEMORY_DB", "")
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from sidekick import EvaluatorOutput, Sidekick
+
+REPLY = "Here is the answer you asked for, written out in a handful of words."
+
+
+class SyncStubModel(BaseChatModel):
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "sync-stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=REPLY))])
+
+
+class BlockingStubModel(SyncStubModel):
+    """Answers ainvoke with the blocking invoke, where it is awaited, as a node calling invoke() would"""
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input, config, **kwargs)
+
+
+class AsyncStubModel(SyncStubModel):
+    @property
+    def _llm_type(self) -> str:
+        return "async-stub"
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=REPLY))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # Spend half the latency before the first token, like a real model
+        words = REPLY.split(" ")
+        await asyncio.sleep(self.latency / 2)
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency / 2 / len(words))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class SyncNodeSidekick(Sidekick):
+    """
+    A Sidekick whose worker and evaluator are plain functions, as they were before, so LangGraph
+    runs each in a thread of the default executor. The node bodies are today's, run to completion
+    in that thread; with BlockingStubModel, their model call blocks the thread as invoke() did.
+    """
+
+    def worker(self, state):
+        return asyncio.run(Sidekick.worker(self, state))
+
+    def evaluator(self, state):
+        return asyncio.run(Sidekick.evaluator(self, state))
+
+
+async def stub_sidekick(mode: str, model: SyncStubModel) -> Sidekick:
+    sidekick = SyncNodeSidekick() if mode == "sync" else Sidekick()
+    sidekick.tools = []
+    sidekick.worker_llm_with_tools = model
+    verdict = EvaluatorOutput(feedback="Looks good", success_criteria_met=True, user_input_needed=False)
+    sidekick.evaluator_llm_with_output = model | RunnableLambda(lambda message: verdict)
+    await sidekick.build_graph()
+    return sidekick
+
+
+async def run_session(sidekick: Sidekick, stream: bool) -> float:
+    """Run one request and return the seconds until the user first sees any of the reply."""
+    start = time.perf_counter()
+    first = None
+    if stream:
+        async for _ in sidekick.stream_superstep("What is the answer?", "", []):
+            first = first or time.perf_counter() - start
+    else:
+        await sidekick.run_superstep("What is the answer?", "", [])
+    return first or time.perf_counter() - start
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def main(mode: str, session_counts: list[int], latency: float):
+    model = AsyncStubModel(latency=latency) if mode == "async" else BlockingStubModel(latency=latency)
+    print(f"{mode} nodes, {latency}s per LLM call, 2 LLM calls per request")
+    print(f"{'sessions':>8} {'wall s':>8} {'req/s':>8} {'first reply s':>14} {'loop lag ms':>12}")
+    for count in session_counts:
+        sidekicks = [await stub_sidekick(mode, model) for _ in range(count)]
+        stop = asyncio.Event()
+        lag = asyncio.create_task(measure_loop_lag(stop))
+        start = time.perf_counter()
+        firsts = await asyncio.gather(*[run_session(sidekick, mode == "async") for sidekick in sidekicks])
+        wall = time.perf_counter() - start
+        stop.set()
+        print(
+            f"{count:>8} {wall:>8.2f} {count / wall:>8.1f} "
+            f"{sum(firsts) / count:>14.2f} {await lag * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="*", default=[1, 8, 32, 128])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--mode", choices=["sync", "blocking", "async", "all"], default="all")
+    args = parser.parse_args()
+    for mode in ["sync", "blocking", "async"] if args.mode == "all" else [args.mode]:
+        asyncio.run(main(mode, args.sessions, args.latency))
@@ -3,15 +3,23 @@ from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from dotenv import load_dotenv
-from langgraph.prebuilt import ToolNode
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 from typing import List, Any, Optional, Dict
 from pydantic import BaseModel, Field
-from sidekick_tools import playwright_tools, other_tools
+from sidekick_tools import playwright_tools, other_tools, browser_pool, ToolExecutor
+from sidekick_cache import tool_cache
+from sidekick_python import python_pool
+from sidekick_memory import (
+    get_checkpointer,
+    compact_messages,
+    prune_checkpoints,
+    delete_thread,
+    delete_thread_from_any_thread,
+    Transcript,
+    count_tokens,
+)
 import uuid
-import asyncio
 from datetime import datetime
 
 load_dotenv(override=True)
@@ -34,27 +42,30 @@ class EvaluatorOutput(BaseModel):
 
 
 class Sidekick:
-    def __init__(self):
+    def __init__(self, sidekick_id: Optional[str] = None):
         self.worker_llm_with_tools = None
         self.evaluator_llm_with_output = None
         self.tools = None
         self.llm_with_tools = None
         self.graph = None
-        self.sidekick_id = str(uuid.uuid4())
-        self.memory = MemorySaver()
-        self.browser = None
-        self.playwright = None
+        # A session given its id can be resumed later, so its thread outlives it; otherwise the
+        # thread can never be found again, and is deleted when the session closes
+        self.resumable = sidekick_id is not None
+        self.sidekick_id = sidekick_id or str(uuid.uuid4())
+        self.memory = None
+        self.transcript = Transcript()
+        self.evaluator_prompt_tokens = []
 
     async def setup(self):
-        self.tools, self.browser, self.playwright = await playwright_tools()
-        self.tools += await other_tools()
+        self.tools = await playwright_tools(self.sidekick_id)
+        self.tools += await other_tools(self.sidekick_id)
         worker_llm = ChatOpenAI(model="gpt-4o-mini")
         self.worker_llm_with_tools = worker_llm.bind_tools(self.tools)
         evaluator_llm = ChatOpenAI(model="gpt-4o-mini")
         self.evaluator_llm_with_output = evaluator_llm.with_structured_output(EvaluatorOutput)
         await self.build_graph()
 
-    def worker(self, state: State) -> Dict[str, Any]:
+    async def worker(self, state: State) -> Dict[str, Any]:
         system_message = f"""You are a helpful assistant that can use tools to complete tasks.
     You keep working on a task until either you have a question or clarification for the user, or the success criteria is met.
     You have many tools to help you, including tools to browse the internet, navigating and retrieving web pages.
@@ -81,7 +92,7 @@ class Sidekick:
         # Add in the system message
 
         found_system_message = False
-        messages = state["messages"]
+        messages, updates = compact_messages(state["messages"])
         for message in messages:
             if isinstance(message, SystemMessage):
                 message.content = system_message
@@ -91,11 +102,11 @@ class Sidekick:
             messages = [SystemMessage(content=system_message)] + messages
 
         # Invoke the LLM with tools
-        response = self.worker_llm_with_tools.invoke(messages)
+        response = await self.worker_llm_with_tools.ainvoke(messages)
 
         # Return updated state
         return {
-            "messages": [response],
+            "messages": updates + [response],
         }
 
     def worker_router(self, state: State) -> str:
@@ -107,16 +118,9 @@ class Sidekick:
             return "evaluator"
 
     def format_conversation(self, messages: List[Any]) -> str:
-        conversation = "Conversation history:\n\n"
-        for message in messages:
-            if isinstance(message, HumanMessage):
-                conversation += f"User: {message.content}\n"
-            elif isinstance(message, AIMessage):
-                text = message.content or "[Tools use]"
-                conversation += f"Assistant: {text}\n"
-        return conversation
-
-    def evaluator(self, state: State) -> State:
+        return self.transcript.update(messages)
+
+    async def evaluator(self, state: State) -> State:
         last_response = state["messages"][-1].content
 
         system_message = """You are an evaluator that determines if a task has been completed successfully by an Assistant.
@@ -149,8 +153,11 @@ class Sidekick:
             SystemMessage(content=system_message),
             HumanMessage(content=user_message),
         ]
+        prompt_tokens = count_tokens(system_message) + count_tokens(user_message)
+        self.evaluator_prompt_tokens.append(prompt_tokens)
+        print(f"Evaluator prompt: {prompt_tokens} tokens")
 
-        eval_result = self.evaluator_llm_with_output.invoke(evaluator_messages)
+        eval_result = await self.evaluator_llm_with_output.ainvoke(evaluator_messages)
         new_state = {
             "messages": [
                 {
@@ -176,7 +183,7 @@ class Sidekick:
 
         # Add nodes
         graph_builder.add_node("worker", self.worker)
-        graph_builder.add_node("tools", ToolNode(tools=self.tools))
+        graph_builder.add_node("tools", ToolExecutor(self.tools))
         graph_builder.add_node("evaluator", self.evaluator)
 
         # Add edges
@@ -190,33 +197,61 @@ class Sidekick:
         graph_builder.add_edge(START, "worker")
 
         # Compile the graph
+        self.memory = self.memory or await get_checkpointer()
         self.graph = graph_builder.compile(checkpointer=self.memory)
 
-    async def run_superstep(self, message, success_criteria, history):
-        config = {"configurable": {"thread_id": self.sidekick_id}}
-
-        state = {
+    def initial_state(self, message, success_criteria) -> State:
+        return {
             "messages": message,
             "success_criteria": success_criteria or "The answer should be clear and accurate",
             "feedback_on_work": None,
             "success_criteria_met": False,
             "user_input_needed": False,
         }
-        result = await self.graph.ainvoke(state, config=config)
+
+    def final_history(self, message, result, history):
         user = {"role": "user", "content": message}
         reply = {"role": "assistant", "content": result["messages"][-2].content}
         feedback = {"role": "assistant", "content": result["messages"][-1].content}
         return history + [user, reply, feedback]
 
+    async def run_superstep(self, message, success_criteria, history):
+        config = {"configurable": {"thread_id": self.sidekick_id}}
+        result = await self.graph.ainvoke(self.initial_state(message, success_criteria), config=config)
+        await prune_checkpoints(self.memory, self.sidekick_id)
+        print(tool_cache.report())
+        return self.final_history(message, result, history)
+
+    async def stream_superstep(self, message, success_criteria, history):
+        """
+        Like run_superstep, but yields the chat history as it grows: each worker reply is
+        streamed token by token, and the final history includes the evaluator's feedback.
+        """
+        config = {"configurable": {"thread_id": self.sidekick_id}}
+        state = self.initial_state(message, success_criteria)
+        user = {"role": "user", "content": message}
+        reply = ""
+        async for event in self.graph.astream_events(state, config=config, version="v2"):
+            if event["metadata"].get("langgraph_node") != "worker":
+                continue
+            if event["event"] == "on_chat_model_start":
+                reply = ""
+            elif event["event"] == "on_chat_model_stream" and event["data"]["chunk"].content:
+                reply += event["data"]["chunk"].content
+                yield history + [user, {"role": "assistant", "content": reply}]
+        result = (await self.graph.aget_state(config)).values
+        await prune_checkpoints(self.memory, self.sidekick_id)
+        print(tool_cache.report())
+        yield self.final_history(message, result, history)
+
+    async def close(self):
+        await browser_pool.release(self.sidekick_id)
+        python_pool.release(self.sidekick_id)
+        if self.memory and not self.resumable:
+            await delete_thread(self.memory, self.sidekick_id)
+
     def cleanup(self):
-        if self.browser:
-            try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(self.browser.close())
-                if self.playwright:
-                    loop.create_task(self.playwright.stop())
-            except RuntimeError:
-                # If no loop is running, do a direct run
-                asyncio.run(self.browser.close())
-                if self.playwright:
-                    asyncio.run(self.playwright.stop())
+        browser_pool.release_from_any_thread(self.sidekick_id)
+        python_pool.release(self.sidekick_id)
+        if self.memory and not self.resumable:
+            delete_thread_from_any_thread(self.sidekick_id)
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from dotenv import load_dotenv
+from langchain_core.tools import BaseTool, Tool
+
+load_dotenv(override=True)
+
+# Results of lookup tools like search and Wikipedia are cached on disk, keyed by tool and normalized query
+TOOL_CACHE_DB = os.getenv("SIDEKICK_TOOL_CACHE_DB", "tool_cache.db")
+TOOL_CACHE_TTL_SECONDS = int(os.getenv("SIDEKICK_TOOL_CACHE_TTL_SECONDS", "3600"))
+
+# Sync tools run here rather than on the event loop, or in the default executor shared with everything else
+TOOL_THREADS = int(os.getenv("SIDEKICK_TOOL_THREADS", "8"))
+
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="sidekick-tool")
+
+
+def run_from_any_thread(loop: asyncio.AbstractEventLoop | None, coroutine_function, *args, timeout: float = 30) -> None:
+    """
+    Run coroutine_function(*args) on the loop that owns its resources, from sync code such as a
+    Gradio delete callback. Off that loop's thread, waits for it to finish; on it, only schedules
+    it, since waiting there would deadlock. Does nothing if the loop has gone.
+    """
+    if loop is None or loop.is_closed():
+        return
+    future = asyncio.run_coroutine_threadsafe(coroutine_function(*args), loop)
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not loop:
+        future.result(timeout=timeout)
+
+
+def normalize(value: Any) -> Any:
+    """Fold case, whitespace and trailing punctuation, so near-identical queries share a cache entry."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().lower().rstrip("?.!")
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value
+
+
+class ToolCache:
+    def __init__(self, path: str = TOOL_CACHE_DB, ttl_seconds: int = TOOL_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = Counter()
+        self.misses = Counter()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Tools run on the event loop thread and in the tool threads, so each thread has its own connection
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results (key TEXT PRIMARY KEY, tool TEXT, result TEXT, expires REAL)"
+            )
+            # put purges expired rows every time, so that has to be a range scan rather than a full one
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_results_expires ON tool_results (expires)")
+            self._local.conn = conn
+        return conn
+
+    def key(self, tool: str, tool_input: Any) -> str:
+        normalized = json.dumps(normalize(tool_input), sort_keys=True)
+        return hashlib.sha256(f"{tool}:{normalized}".encode()).hexdigest()
+
+    def get(self, tool: str, key: str) -> str | None:
+        row = self._connection().execute(
+            "SELECT result FROM tool_results WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        if row:
+            self.hits[tool] += 1
+            return row[0]
+        self.misses[tool] += 1
+        return None
+
+    def put(self, tool: str, key: str, result: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool, result, expires) VALUES (?, ?, ?, ?)",
+                (key, tool, result, time.time() + self.ttl_seconds),
+            )
+            conn.execute("DELETE FROM tool_results WHERE expires <= ?", (time.time(),))
+
+    def report(self) -> str:
+        lines = ["Tool cache:"]
+        for tool in sorted(set(self.hits) | set(self.misses)):
+            calls = self.hits[tool] + self.misses[tool]
+            lines.append(f"  {tool}: {self.hits[tool]}/{calls} hits ({self.hits[tool] / calls:.0%})")
+        return "\n".join(lines)
+
+
+tool_cache = ToolCache()
+
+
+def cached_tool(tool: BaseTool, cache: ToolCache = tool_cache) -> Tool:
+    """
+    Wrap a sync, single-input LangChain tool: results are served from the tool cache while
+    fresh, and otherwise the tool runs in the tool thread pool. The wrapper keeps the tool's
+    name, description and schema, so the model sees the same tool.
+    """
+
+    def run(query: str) -> str:
+        key = cache.key(tool.name, query)
+        result = cache.get(tool.name, key)
+        if result is None:
+            result = tool.invoke(query)
+            if isinstance(result, str):
+                cache.put(tool.name, key, result)
+        return result
+
+    async def arun(query: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(tool_executor, run, query)
+
+    return Tool(
+        name=tool.name, description=tool.description, args_schema=tool.args_schema, func=run, coroutine=arun
+    )
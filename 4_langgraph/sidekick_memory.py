@@ -0,0 +1,222 @@
+import asyncio
+import os
+import time
+from collections import deque
+from functools import lru_cache
+import aiosqlite
+import tiktoken
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from sidekick_cache import run_from_any_thread
+
+load_dotenv(override=True)
+
+# Where Sidekick threads are checkpointed; set SIDEKICK_MEMORY_DB to an empty string to keep them in RAM
+MEMORY_DB = os.getenv("SIDEKICK_MEMORY_DB", "memory.db")
+
+# Compaction: the messages kept in a thread's state, and so sent to the worker, are held to
+# this many tokens, dropping whole turns from the start; tool outputs from earlier turns are
+# cut down to TOOL_OUTPUT_CHARS, since the worker has already used them
+HISTORY_TOKEN_BUDGET = int(os.getenv("SIDEKICK_HISTORY_TOKENS", "16000"))
+TOOL_OUTPUT_CHARS = int(os.getenv("SIDEKICK_TOOL_OUTPUT_CHARS", "1000"))
+
+# The evaluator sees at most this many tokens of the conversation, keeping the most recent lines
+EVALUATOR_TRANSCRIPT_TOKENS = int(os.getenv("SIDEKICK_EVALUATOR_TOKENS", "6000"))
+TOKENIZER_MODEL = "gpt-4o-mini"
+
+# Each superstep writes a full checkpoint of the thread; only the latest few are kept
+CHECKPOINTS_KEPT = int(os.getenv("SIDEKICK_CHECKPOINTS_KEPT", "10"))
+
+# A Sidekick thread that hasn't run for this many days is deleted, in case its session was never closed
+THREAD_RETENTION_DAYS = float(os.getenv("SIDEKICK_THREAD_RETENTION_DAYS", "7"))
+
+_checkpointer = None
+_checkpointer_loop = None
+
+
+async def get_checkpointer():
+    """One checkpointer per process, shared by every Sidekick session."""
+    global _checkpointer, _checkpointer_loop
+    loop = asyncio.get_running_loop()
+    if _checkpointer is None or _checkpointer_loop is not loop:
+        if MEMORY_DB:
+            conn = await aiosqlite.connect(MEMORY_DB)
+            await conn.execute("PRAGMA synchronous=NORMAL")
+            _checkpointer = AsyncSqliteSaver(conn)
+            await _checkpointer.setup()
+            await _setup_thread_activity(_checkpointer)
+        else:
+            _checkpointer = MemorySaver()
+        _checkpointer_loop = loop
+    return _checkpointer
+
+
+def compact_messages(messages: list) -> tuple[list, list]:
+    """
+    Bring a thread's messages within HISTORY_TOKEN_BUDGET. Returns the compacted messages,
+    and the state updates that make the same change: a RemoveMessage for each message
+    dropped, and a shortened copy of each old tool output, with the same id so that
+    add_messages replaces it. Shortened copies are marked as compacted in additional_kwargs,
+    so each tool output is only cut down, and written back to the thread, once.
+    """
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+    updates = []
+    compacted = []
+    for i, message in enumerate(messages):
+        if (
+            i < last_human
+            and isinstance(message, ToolMessage)
+            and isinstance(message.content, str)
+            and len(message.content) > TOOL_OUTPUT_CHARS
+            and not message.additional_kwargs.get("compacted")
+        ):
+            dropped = len(message.content) - TOOL_OUTPUT_CHARS
+            content = f"{message.content[:TOOL_OUTPUT_CHARS]}\n[{dropped} more characters of tool output removed]"
+            additional_kwargs = {**message.additional_kwargs, "compacted": True}
+            message = message.model_copy(update={"content": content, "additional_kwargs": additional_kwargs})
+            updates.append(message)
+        compacted.append(message)
+    if count_tokens_approximately(compacted) > HISTORY_TOKEN_BUDGET:
+        kept = trim_messages(
+            compacted,
+            max_tokens=HISTORY_TOKEN_BUDGET,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+        )
+        # Always keep the current turn, even if it alone is over the budget
+        kept_ids = {m.id for m in kept} | {m.id for m in compacted[last_human:]}
+        removed = {m.id for m in compacted if m.id not in kept_ids}
+        compacted = [m for m in compacted if m.id not in removed]
+        updates = [m for m in updates if m.id not in removed]
+        updates += [RemoveMessage(id=message_id) for message_id in removed]
+    return compacted, updates
+
+
+async def _setup_thread_activity(checkpointer: AsyncSqliteSaver) -> None:
+    """
+    Track when each Sidekick thread last ran. Only threads recorded by prune_checkpoints are
+    tracked, and so ever expired: the database may hold other threads, such as the labs'.
+    """
+    async with checkpointer.lock:
+        await checkpointer.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated REAL NOT NULL)"
+        )
+        await checkpointer.conn.commit()
+    await expire_threads(checkpointer)
+
+
+async def expire_threads(checkpointer) -> None:
+    """Delete every Sidekick thread that hasn't run for THREAD_RETENTION_DAYS."""
+    if not isinstance(checkpointer, AsyncSqliteSaver):
+        return
+    async with checkpointer.lock:
+        cursor = await checkpointer.conn.execute(
+            "SELECT thread_id FROM thread_activity WHERE updated < ?",
+            (time.time() - THREAD_RETENTION_DAYS * 24 * 60 * 60,),
+        )
+        stale = await cursor.fetchall()
+    for (thread_id,) in stale:
+        await delete_thread(checkpointer, thread_id)
+
+
+async def delete_thread(checkpointer, thread_id: str) -> None:
+    """Delete all of a thread's checkpoints and pending writes."""
+    await checkpointer.adelete_thread(thread_id)
+    if isinstance(checkpointer, AsyncSqliteSaver):
+        async with checkpointer.lock:
+            await checkpointer.conn.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+            await checkpointer.conn.commit()
+
+
+def delete_thread_from_any_thread(thread_id: str) -> None:
+    """Delete a thread from sync code, such as a Gradio delete callback, on or off the checkpointer's loop."""
+    if _checkpointer is not None:
+        run_from_any_thread(_checkpointer_loop, delete_thread, _checkpointer, thread_id)
+
+
+async def prune_checkpoints(checkpointer, thread_id: str) -> None:
+    """
+    Delete all but the latest CHECKPOINTS_KEPT checkpoints of a thread, and their pending writes,
+    note that the thread has just run, and expire threads that haven't run for a while.
+    """
+    if not isinstance(checkpointer, AsyncSqliteSaver):
+        return
+    async with checkpointer.lock:
+        await checkpointer.conn.execute(
+            "INSERT INTO thread_activity (thread_id, updated) VALUES (?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET updated=excluded.updated",
+            (thread_id, time.time()),
+        )
+        cursor = await checkpointer.conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, CHECKPOINTS_KEPT - 1),
+        )
+        row = await cursor.fetchone()
+        if row:
+            for table in ["checkpoints", "writes"]:
+                await checkpointer.conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, row[0])
+                )
+        await checkpointer.conn.commit()
+    await expire_threads(checkpointer)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception as e:
+        # tiktoken downloads its encodings on first use; without them, estimate instead
+        print(f"Could not load the {TOKENIZER_MODEL} tokenizer, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding else len(text) // 4 + 1
+
+
+class Transcript:
+    """
+    The conversation formatted for the evaluator, built incrementally: each message is
+    formatted and tokenized once, the first time it is seen, and the oldest lines are
+    dropped to stay within max_tokens.
+    """
+
+    def __init__(self, max_tokens: int = EVALUATOR_TRANSCRIPT_TOKENS):
+        self.max_tokens = max_tokens
+        self.lines = deque()
+        self.seen = set()
+        self.tokens = 0
+        self.dropped = 0
+
+    def update(self, messages: list) -> str:
+        for message in messages:
+            if message.id in self.seen:
+                continue
+            self.seen.add(message.id)
+            if isinstance(message, HumanMessage):
+                line = f"User: {message.content}\n"
+            elif isinstance(message, AIMessage):
+                line = f"Assistant: {message.content or '[Tools use]'}\n"
+            else:
+                continue
+            tokens = count_tokens(line)
+            self.lines.append((line, tokens))
+            self.tokens += tokens
+        while self.tokens > self.max_tokens and len(self.lines) > 1:
+            _, tokens = self.lines.popleft()
+            self.tokens -= tokens
+            self.dropped += 1
+        return self.text()
+
+    def text(self) -> str:
+        header = "Conversation history:\n\n"
+        if self.dropped:
+            header += f"[{self.dropped} earlier messages omitted]\n"
+        return header + "".join(line for line, _ in self.lines)
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+from dotenv import load_dotenv
+from langchain_core.tools import Tool
+from langchain_experimental.tools.python.tool import PythonREPLTool, sanitize_input
+
+load_dotenv(override=True)
+
+# Model-written Python runs in a pool of worker processes, not in the app's own process
+PYTHON_WORKERS = int(os.getenv("SIDEKICK_PYTHON_WORKERS", "4"))
+PYTHON_TIMEOUT_SECONDS = float(os.getenv("SIDEKICK_PYTHON_TIMEOUT_SECONDS", "30"))
+PYTHON_CPU_SECONDS = int(os.getenv("SIDEKICK_PYTHON_CPU_SECONDS", "20"))
+PYTHON_MEMORY_MB = int(os.getenv("SIDEKICK_PYTHON_MEMORY_MB", "1024"))
+# How long a worker has to finish its warm imports and connect back before it is given up on
+PYTHON_STARTUP_SECONDS = float(os.getenv("SIDEKICK_PYTHON_STARTUP_SECONDS", "60"))
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sidekick_python_worker.py")
+
+# Threads that wait on the workers for async callers
+python_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="sidekick-python")
+
+
+class PythonWorker:
+    """One worker process, started with sidekick_python_worker.py and connected over localhost."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = set()
+        # Sessions released while the worker was busy, to be dropped before its next snippet
+        self.released = deque()
+        self._launch()
+
+    def _launch(self) -> None:
+        authkey = secrets.token_bytes(32)
+        self.listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        port = self.listener.address[1]
+        args = [sys.executable, WORKER_SCRIPT, str(port), str(PYTHON_CPU_SECONDS), str(PYTHON_MEMORY_MB)]
+        env = {**os.environ, "SIDEKICK_PYTHON_AUTHKEY": authkey.hex()}
+        self.process = subprocess.Popen(args, env=env, stdin=subprocess.DEVNULL)
+        self.conn = None
+
+    def connect(self) -> None:
+        """
+        Wait for the worker to finish its warm imports and connect back. Raises RuntimeError if
+        the worker exits, or hasn't connected within PYTHON_STARTUP_SECONDS.
+        """
+        if self.conn is not None:
+            return
+        deadline = time.monotonic() + PYTHON_STARTUP_SECONDS
+        # Wake up from accept every so often to check that the worker is still coming
+        self.listener._listener._socket.settimeout(0.5)
+        while self.conn is None:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"The Python worker exited with code {self.process.returncode} while starting")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"The Python worker didn't start within {PYTHON_STARTUP_SECONDS:g} seconds")
+            try:
+                self.conn = self.listener.accept()
+            except socket.timeout:
+                pass
+            except AuthenticationError:
+                raise RuntimeError("The Python worker failed to authenticate")
+        self.listener.close()
+
+    def _restart(self) -> None:
+        """Replace the worker process with a new one, which connects on its next snippet."""
+        self.close()
+        self.sessions.clear()
+        self._launch()
+
+    def run(self, session_id: str, code: str, timeout: float) -> str:
+        with self.lock:
+            try:
+                return self._run(session_id, code, timeout)
+            finally:
+                self._send_released()
+
+    def _run(self, session_id: str, code: str, timeout: float) -> str:
+        try:
+            self.connect()
+            # A session released and then pinned here again starts from fresh globals
+            self._send_released()
+            self.conn.send((session_id, code))
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+            message = f"Execution timed out after {timeout:g} seconds"
+        except (EOFError, OSError):
+            message = "The Python worker stopped unexpectedly"
+        except RuntimeError as e:
+            message = str(e)
+        # Every session on this worker loses its variables when it is restarted
+        self._restart()
+        return f"{message}; the Python session has been reset"
+
+    def release(self, session_id: str) -> None:
+        """
+        Drop a session's globals. Never waits on a running snippet, since it is called from the
+        event loop: if the worker is busy, the session is dropped as soon as the snippet finishes.
+        """
+        if session_id not in self.sessions:
+            return
+        self.sessions.discard(session_id)
+        self.released.append(session_id)
+        if self.lock.acquire(blocking=False):
+            try:
+                self._send_released()
+            finally:
+                self.lock.release()
+
+    def _send_released(self) -> None:
+        # Called with the lock held
+        while self.released:
+            session_id = self.released.popleft()
+            if self.conn is None:
+                # A worker that hasn't connected yet is a new process, which has no sessions
+                continue
+            try:
+                self.conn.send((session_id, None))
+            except OSError:
+                # The worker has died; it is restarted on its next snippet
+                pass
+
+    def close(self) -> None:
+        self.process.kill()
+        self.process.wait()
+        if self.conn is not None:
+            self.conn.close()
+        else:
+            self.listener.close()
+
+
+class PythonWorkerPool:
+    """
+    A fixed pool of worker processes for model-written Python, started when first needed.
+    Each session is pinned to the worker with the fewest sessions, so its variables persist
+    from one snippet to the next, isolated from other sessions in their own globals. A
+    snippet that runs past the time limit, or kills its worker, gets the worker restarted.
+    """
+
+    def __init__(self, size: int = PYTHON_WORKERS, timeout: float = PYTHON_TIMEOUT_SECONDS):
+        self.size = size
+        self.timeout = timeout
+        self.workers = []
+        self.assignments = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if not self.workers:
+                # Launch them all before waiting for any, so they import in parallel
+                self.workers = [PythonWorker() for _ in range(self.size)]
+                for worker in self.workers:
+                    try:
+                        worker.connect()
+                    except RuntimeError as e:
+                        # Don't hold up the pool; the new worker is waited for on its first snippet
+                        print(f"{e}, starting another")
+                        worker._restart()
+
+    def worker_for(self, session_id: str) -> PythonWorker:
+        self.start()
+        with self._lock:
+            worker = self.assignments.get(session_id)
+            if worker is None or session_id not in worker.sessions:
+                worker = min(self.workers, key=lambda w: len(w.sessions))
+                worker.sessions.add(session_id)
+                self.assignments[session_id] = worker
+            return worker
+
+    def run(self, session_id: str, code: str) -> str:
+        return self.worker_for(session_id).run(session_id, sanitize_input(code), self.timeout)
+
+    async def arun(self, session_id: str, code: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(python_executor, self.run, session_id, code)
+
+    def release(self, session_id: str) -> None:
+        # Without the pool lock, which start() holds while workers connect; a single pop is atomic
+        worker = self.assignments.pop(session_id, None)
+        if worker:
+            worker.release(session_id)
+
+    def close(self) -> None:
+        with self._lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers = []
+            self.assignments.clear()
+
+
+python_pool = PythonWorkerPool()
+
+
+def python_tool(session_id: str) -> Tool:
+    """A drop-in for PythonREPLTool that runs the session's code in the worker pool."""
+    return Tool(
+        name=PythonREPLTool.model_fields["name"].default,
+        description=PythonREPLTool.model_fields["description"].default,
+        func=lambda code: python_pool.run(session_id, code),
+        coroutine=lambda code: python_pool.arun(session_id, code),
+    )
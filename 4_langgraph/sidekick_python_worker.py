@@ -0,0 +1,86 @@
+"""
+A Python worker for the Sidekick's Python tool, started by sidekick_python.PythonWorkerPool.
+
+It imports the common data libraries up front, connects back to the pool, and then runs the
+snippets it is sent, each session in its own globals, replying with whatever they print.
+Kept free of the app's own imports, so that each worker starts quickly and stays small.
+"""
+
+import contextlib
+import io
+import os
+import signal
+import sys
+import traceback
+from multiprocessing.connection import Client
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the CPU and memory limits are not applied
+    resource = None
+
+WARM_IMPORTS = ["numpy", "pandas"]
+
+
+def cpu_limit_exceeded(signum, frame):
+    raise TimeoutError("CPU time limit exceeded")
+
+
+def limit_memory(memory_mb: int) -> None:
+    """Allow snippets memory_mb of address space on top of what the warm imports have mapped."""
+    if resource is None or not memory_mb:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            mapped = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        mapped = 0
+    memory = mapped + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+
+def limit_cpu_for_next_snippet(cpu_seconds: int) -> None:
+    # RLIMIT_CPU counts the whole life of the process, so move the soft limit on for each snippet;
+    # going over it raises SIGXCPU, which cpu_limit_exceeded turns into an exception
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, resource.RLIM_INFINITY))
+
+
+def serve(conn, cpu_seconds: int) -> None:
+    namespaces = {}
+    while True:
+        try:
+            session_id, code = conn.recv()
+        except EOFError:
+            return
+        if code is None:
+            namespaces.pop(session_id, None)
+            continue
+        namespace = namespaces.setdefault(session_id, {"__name__": "__main__"})
+        output = io.StringIO()
+        limit_cpu_for_next_snippet(cpu_seconds)
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                exec(code, namespace)
+            result = output.getvalue()
+        except BaseException as e:
+            result = output.getvalue() + "".join(traceback.format_exception_only(type(e), e))
+        conn.send(result)
+
+
+if __name__ == "__main__":
+    port, cpu_seconds, memory_mb = (int(arg) for arg in sys.argv[1:4])
+    for module in WARM_IMPORTS:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, cpu_limit_exceeded)
+    limit_memory(memory_mb)
+    authkey = bytes.fromhex(os.environ.pop("SIDEKICK_PYTHON_AUTHKEY"))
+    serve(Client(("127.0.0.1", port), authkey=authkey), cpu_seconds)
@@ -1,14 +1,20 @@
-from playwright.async_api import async_playwright
+import asyncio
+import time
+import psutil
+from playwright.async_api import async_playwright, Browser, BrowserContext
 from langchain_community.agent_toolkits import PlayWrightBrowserToolkit
 from dotenv import load_dotenv
 import os
 import requests
 from langchain.agents import Tool
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool
 from langchain_community.agent_toolkits import FileManagementToolkit
 from langchain_community.tools.wikipedia.tool import WikipediaQueryRun
-from langchain_experimental.tools import PythonREPLTool
 from langchain_community.utilities import GoogleSerperAPIWrapper
 from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
+from sidekick_cache import cached_tool, run_from_any_thread, tool_executor
+from sidekick_python import python_tool
 
 
 
@@ -18,11 +24,205 @@ pushover_user = os.getenv("PUSHOVER_USER")
 pushover_url = "https://api.pushover.net/1/messages.json"
 serper = GoogleSerperAPIWrapper()
 
-async def playwright_tools():
-    playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=False)
+# One browser is shared by every session in the process; set SIDEKICK_HEADLESS=false to watch it work
+HEADLESS = os.getenv("SIDEKICK_HEADLESS", "true").lower() != "false"
+MAX_BROWSER_CONTEXTS = int(os.getenv("SIDEKICK_MAX_BROWSER_CONTEXTS", "20"))
+BROWSER_IDLE_SECONDS = int(os.getenv("SIDEKICK_BROWSER_IDLE_SECONDS", "600"))
+EVICTION_INTERVAL_SECONDS = 30
+
+# How long a tool call may take before the worker is told it timed out
+TOOL_TIMEOUT_SECONDS = float(os.getenv("SIDEKICK_TOOL_TIMEOUT_SECONDS", "120"))
+TOOL_TIMEOUTS = {"send_push_notification": 15, "search": 30, "wikipedia": 30}
+
+
+class SessionBrowser(Browser):
+    """
+    The shared browser as one session's tools see it. The playwright tools always use the
+    browser's first context, so this browser's only context is the session's own, created
+    through the pool the first time a tool needs it, and again if it has been evicted.
+    """
+
+    def __init__(self, pool: "BrowserPool", session_id: str):
+        super().__init__(pool.browser._impl_obj)
+        self.pool = pool
+        self.session_id = session_id
+
+    @property
+    def contexts(self) -> list[BrowserContext]:
+        context = self.pool.contexts.get(self.session_id)
+        if context:
+            self.pool.last_used[self.session_id] = time.monotonic()
+        return [context] if context else []
+
+    async def new_context(self, **kwargs) -> BrowserContext:
+        return await self.pool.new_context(self.session_id)
+
+    async def close(self, **kwargs) -> None:
+        await self.pool.release(self.session_id)
+
+
+class BrowserPool:
+    """
+    A process-wide headless Chromium, with a browser context (its own pages and cookies) for
+    each Sidekick session. At most MAX_BROWSER_CONTEXTS contexts are open, closing the least
+    recently used to make room, and contexts idle for BROWSER_IDLE_SECONDS are closed.
+    """
+
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.loop = None
+        self.contexts: dict[str, BrowserContext] = {}
+        self.last_used: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._evictor = None
+
+    async def session_browser(self, session_id: str) -> SessionBrowser:
+        async with self._lock:
+            await self._start()
+        return SessionBrowser(self, session_id)
+
+    async def new_context(self, session_id: str) -> BrowserContext:
+        async with self._lock:
+            await self._start()
+            await self._close_context(session_id)
+            while len(self.contexts) >= MAX_BROWSER_CONTEXTS:
+                await self._close_context(min(self.contexts, key=lambda name: self.last_used[name]))
+            self.contexts[session_id] = await self.browser.new_context()
+            self.last_used[session_id] = time.monotonic()
+            print(self.report())
+            return self.contexts[session_id]
+
+    async def release(self, session_id: str) -> None:
+        async with self._lock:
+            await self._close_context(session_id)
+
+    def release_from_any_thread(self, session_id: str) -> None:
+        """Release a session from sync code, such as a Gradio delete callback, on or off the pool's loop."""
+        run_from_any_thread(self.loop, self.release, session_id)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._evictor:
+                self._evictor.cancel()
+            for session_id in list(self.contexts):
+                await self._close_context(session_id)
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+            self.browser = None
+            self.playwright = None
+
+    async def _start(self) -> None:
+        if self.browser and self.browser.is_connected():
+            return
+        self.playwright = self.playwright or await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=HEADLESS)
+        self.loop = asyncio.get_running_loop()
+        self.contexts.clear()
+        self.last_used.clear()
+        if self._evictor is None or self._evictor.done():
+            self._evictor = asyncio.create_task(self._evict_idle())
+
+    async def _close_context(self, session_id: str) -> None:
+        context = self.contexts.pop(session_id, None)
+        self.last_used.pop(session_id, None)
+        if context:
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Exception closing browser context: {e}")
+
+    async def _evict_idle(self) -> None:
+        while True:
+            await asyncio.sleep(EVICTION_INTERVAL_SECONDS)
+            async with self._lock:
+                cutoff = time.monotonic() - BROWSER_IDLE_SECONDS
+                for session_id in [name for name, used in self.last_used.items() if used < cutoff]:
+                    await self._close_context(session_id)
+
+    def rss_mb(self) -> float:
+        """Resident memory of the browser and its playwright driver, in MB."""
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                if "playwright" in " ".join(child.cmdline()):
+                    total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+
+    def report(self) -> str:
+        rss = self.rss_mb()
+        per_session = rss / len(self.contexts) if self.contexts else 0
+        return f"Browser pool: {len(self.contexts)} sessions, {rss:,.0f} MB RSS, {per_session:,.0f} MB per session"
+
+
+browser_pool = BrowserPool()
+
+
+async def playwright_tools(session_id: str):
+    browser = await browser_pool.session_browser(session_id)
     toolkit = PlayWrightBrowserToolkit.from_browser(async_browser=browser)
-    return toolkit.get_tools(), browser, playwright
+    return toolkit.get_tools()
+
+
+def is_async_tool(tool: BaseTool) -> bool:
+    if isinstance(tool, (Tool, StructuredTool)):
+        return tool.coroutine is not None
+    return type(tool)._arun is not BaseTool._arun
+
+
+class ToolExecutor:
+    """
+    The graph's tools node: runs every tool call in the worker's last message at the same
+    time, async tools on the event loop and sync tools in the tool thread pool, each within
+    its timeout, and returns the results in the order of the calls. Each superstep prints
+    how long the calls took together, against how long they would have taken one by one.
+    """
+
+    def __init__(self, tools: list[BaseTool]):
+        self.tools = {tool.name: tool for tool in tools}
+        self.seconds_saved = []
+
+    async def __call__(self, state) -> dict:
+        calls = state["messages"][-1].tool_calls
+        start = time.perf_counter()
+        results = await asyncio.gather(*[self.run_one(call) for call in calls])
+        elapsed = time.perf_counter() - start
+        serial = sum(seconds for _, seconds in results)
+        self.seconds_saved.append(serial - elapsed)
+        print(
+            f"Tools: {len(calls)} calls in {elapsed:.2f}s, "
+            f"{serial:.2f}s one by one, saved {serial - elapsed:.2f}s"
+        )
+        return {"messages": [message for message, _ in results]}
+
+    async def run_one(self, call) -> tuple[ToolMessage, float]:
+        start = time.perf_counter()
+        tool = self.tools.get(call["name"])
+        timeout = TOOL_TIMEOUTS.get(call["name"], TOOL_TIMEOUT_SECONDS)
+        tool_call = {**call, "type": "tool_call"}
+        try:
+            if tool is None:
+                raise ValueError(f"{call['name']} is not a valid tool, try one of {', '.join(self.tools)}")
+            if is_async_tool(tool):
+                pending = tool.ainvoke(tool_call)
+            else:
+                pending = asyncio.get_running_loop().run_in_executor(tool_executor, tool.invoke, tool_call)
+            message = await asyncio.wait_for(pending, timeout)
+        except asyncio.TimeoutError:
+            message = ToolMessage(
+                content=f"Error: {call['name']} timed out after {timeout:g} seconds",
+                name=call["name"], tool_call_id=call["id"], status="error",
+            )
+        except Exception as e:
+            message = ToolMessage(
+                content=f"Error: {e!r}\n Please fix your mistakes.",
+                name=call["name"], tool_call_id=call["id"], status="error",
+            )
+        return message, time.perf_counter() - start
 
 
 def push(text: str):
@@ -36,20 +236,20 @@ def get_file_tools():
     return toolkit.get_tools()
 
 
-async def other_tools():
+async def other_tools(session_id: str):
     push_tool = Tool(name="send_push_notification", func=push, description="Use this tool when you want to send a push notification")
     file_tools = get_file_tools()
 
-    tool_search =Tool(
+    tool_search = cached_tool(Tool(
         name="search",
         func=serper.run,
         description="Use this tool when you want to get the results of an online web search"
-    )
+    ))
 
     wikipedia = WikipediaAPIWrapper()
-    wiki_tool = WikipediaQueryRun(api_wrapper=wikipedia)
+    wiki_tool = cached_tool(WikipediaQueryRun(api_wrapper=wikipedia))
 
-    python_repl = PythonREPLTool()
+    python_repl = python_tool(session_id)
     
     return file_tools + [push_tool, tool_search, python_repl,  wiki_tool]
 
@@ -1,8 +1,9 @@
 from autogen_core import MessageContext, RoutedAgent, message_handler
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 import messages
+import model_clients
+import response_cache
 import random
 from dotenv import load_dotenv
 
@@ -28,18 +29,21 @@ class Agent(RoutedAgent):
 
     def __init__(self, name) -> None:
         super().__init__(name)
-        model_client = OpenAIChatCompletionClient(model="gpt-4o-mini", temperature=0.7)
+        model_client = model_clients.model_client(name, temperature=0.7)
         self._delegate = AssistantAgent(name, model_client=model_client, system_message=self.system_message)
 
     @message_handler
+    @response_cache.cached
     async def handle_message(self, message: messages.Message, ctx: MessageContext) -> messages.Message:
         print(f"{self.id.type}: Received message")
         text_message = TextMessage(content=message.content, source="user")
         response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
         idea = response.chat_message.content
-        if random.random() < self.CHANCES_THAT_I_BOUNCE_IDEA_OFF_ANOTHER:
+        hops = message.hops
+        if hops < messages.MAX_HOPS and random.random() < self.CHANCES_THAT_I_BOUNCE_IDEA_OFF_ANOTHER:
             recipient = messages.find_recipient()
             message = f"Here is my business idea. It may not be your speciality, but please refine it and make it better. {idea}"
-            response = await self.send_message(messages.Message(content=message), recipient)
+            response = await self.send_message(messages.Message(content=message, hops=hops + 1), recipient)
             idea = response.content
-        return messages.Message(content=idea)
\ No newline at end of file
+            hops = response.hops
+        return messages.Message(content=idea, hops=hops)
\ No newline at end of file
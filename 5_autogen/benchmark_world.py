@@ -0,0 +1,126 @@
+"""
+Run world.py against a local stand-in for the OpenAI API, and count the connections the
+agents open to it, with every agent's model client sharing one connection pool per process
+(the default) and with a pool per agent (AUTOGEN_SHARE_CONNECTIONS=false).
+
+The stand-in answers the Creator with the agent.py template, and every other request with
+a short idea, after a fixed latency. Each run happens in a scratch directory, so the agent
+and idea files it writes don't land here.
+
+    uv run benchmark_world.py --agents 40 --workers 1 2 --latency 0.3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(HERE, "agent.py"), encoding="utf-8") as f:
+    TEMPLATE = f.read()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.connections = 0
+            self.open_connections = 0
+            self.peak_connections = 0
+            self.requests = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1, so that clients can keep connections open between requests
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+            self.server.open_connections += 1
+            self.server.peak_connections = max(self.server.peak_connections, self.server.open_connections)
+
+    def finish(self):
+        super().finish()
+        with self.server.lock:
+            self.server.open_connections -= 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+        system = " ".join(m["content"] for m in body["messages"] if m["role"] == "system")
+        text = TEMPLATE if "create new AI Agents" in system else "An idea: an agentic concierge for small clinics."
+        reply = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(json.dumps(body["messages"])) // 4, "completion_tokens": len(text) // 4},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_world(server: StubServer, agents: int, workers: int, share: bool) -> list[str]:
+    server.reset()
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+        "OPENAI_API_KEY": "stub",
+        "AUTOGEN_SHARE_CONNECTIONS": str(share).lower(),
+        "PYTHONPATH": HERE,
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        shutil.copy(os.path.join(HERE, "agent.py"), scratch)
+        args = [sys.executable, os.path.join(HERE, "world.py"), "--agents", str(agents), "--workers", str(workers)]
+        output = subprocess.run(args, cwd=scratch, env=env, capture_output=True, text=True).stdout
+    return [line.strip() for line in output.splitlines() if " workers: " in line or "model requests" in line or "cache hits" in line]
+
+
+def main(agents: int, workers: list[int], latency: float):
+    server = StubServer(latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for how_many_workers in workers:
+        for share in (False, True):
+            lines = run_world(server, agents, how_many_workers, share)
+            pool = "shared pool" if share else "pool per agent"
+            print(f"{pool}, {how_many_workers} workers:")
+            for line in lines:
+                print(f"  {line}")
+            print(
+                f"  {server.requests} requests over {server.connections} connections "
+                f"(at most {server.peak_connections} open at once)"
+            )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1])
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds the stand-in takes to answer")
+    args = parser.parse_args()
+    main(args.agents, args.workers, args.latency)
@@ -1,10 +1,14 @@
-from autogen_core import MessageContext, RoutedAgent, message_handler
+from autogen_core import MessageContext, RoutedAgent, TopicId, message_handler, type_subscription
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 import messages
+import model_clients
 from autogen_core import TRACE_LOGGER_NAME
-import importlib
+import asyncio
+import importlib.util
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from autogen_core import AgentId
 from dotenv import load_dotenv
@@ -16,9 +20,27 @@ logger = logging.getLogger(TRACE_LOGGER_NAME)
 logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
 
+# Generated agents are written and compiled here, so the Creator's event loop keeps handling other agents' messages
+loader = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-loader")
 
+
+def load_agent_module(agent_name: str, filename: str, code: str):
+    """Write the generated code to its file and load it as a fresh module."""
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(code)
+    spec = importlib.util.spec_from_file_location(agent_name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[agent_name] = module
+    return module
+
+
+@type_subscription(topic_type=messages.AGENTS_TOPIC)
 class Creator(RoutedAgent):
 
+    # When each agent this process created went live, for measuring agents/sec
+    registered_at = {}
+
     # Change this system message to reflect the unique characteristics of this agent
 
     system_message = """
@@ -36,17 +58,24 @@ class Creator(RoutedAgent):
 
     def __init__(self, name) -> None:
         super().__init__(name)
-        model_client = OpenAIChatCompletionClient(model="gpt-4o-mini", temperature=1.0)
+        # The Creator serves every request to make an agent, so it is only held to the global cap
+        model_client = model_clients.model_client(
+            name, temperature=1.0, max_concurrent=model_clients.MAX_CONCURRENT_REQUESTS
+        )
         self._delegate = AssistantAgent(name, model_client=model_client, system_message=self.system_message)
+        self._user_prompt = None
 
     def get_user_prompt(self):
-        prompt = "Please generate a new Agent based strictly on this template. Stick to the class structure. \
+        # The template doesn't change while the world runs, so read it once
+        if self._user_prompt is None:
+            prompt = "Please generate a new Agent based strictly on this template. Stick to the class structure. \
             Respond only with the python code, no other text, and no markdown code blocks.\n\n\
             Be creative about taking the agent in a new direction, but don't change method signatures.\n\n\
             Here is the template:\n\n"
-        with open("agent.py", "r", encoding="utf-8") as f:
-            template = f.read()
-        return prompt + template   
+            with open("agent.py", "r", encoding="utf-8") as f:
+                template = f.read()
+            self._user_prompt = prompt + template
+        return self._user_prompt
         
 
     @message_handler
@@ -55,11 +84,19 @@ class Creator(RoutedAgent):
         agent_name = filename.split(".")[0]
         text_message = TextMessage(content=self.get_user_prompt(), source="user")
         response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(response.chat_message.content)
+        module = await asyncio.get_running_loop().run_in_executor(
+            loader, load_agent_module, agent_name, filename, response.chat_message.content
+        )
         print(f"** Creator has created python code for agent {agent_name} - about to register with Runtime")
-        module = importlib.import_module(agent_name)
         await module.Agent.register(self.runtime, agent_name, lambda: module.Agent(agent_name))
+        Creator.registered_at[agent_name] = time.time()
+        messages.add_recipient(agent_name)
+        await self.publish_message(messages.AgentLive(name=agent_name), TopicId(messages.AGENTS_TOPIC, "default"))
         logger.info(f"** Agent {agent_name} is live")
         result = await self.send_message(messages.Message(content="Give me an idea"), AgentId(agent_name, "default"))
-        return messages.Message(content=result.content)
\ No newline at end of file
+        messages.hops_per_idea[result.hops] += 1
+        return messages.Message(content=result.content, hops=result.hops)
+
+    @message_handler
+    async def handle_agent_live(self, message: messages.AgentLive, ctx: MessageContext) -> None:
+        messages.add_recipient(message.name)
@@ -1,22 +1,53 @@
 from dataclasses import dataclass
+from collections import Counter
 from autogen_core import AgentId
-import glob
+from dotenv import load_dotenv
 import os
 
 
 import random
 
+load_dotenv(override=True)
+
+# How many times an idea can be bounced on to another agent before it has to come back
+MAX_HOPS = int(os.getenv("AUTOGEN_MAX_HOPS", "3"))
+
+# Every Creator subscribes to this topic, where each new agent is announced to all the worker runtimes
+AGENTS_TOPIC = "agents"
+
 @dataclass
 class Message:
     content: str
+    # Going out, how many bounces led to this message; coming back, how many the idea went through
+    hops: int = 0
+
+
+@dataclass
+class AgentLive:
+    # Published to AGENTS_TOPIC once an agent is registered, so that agents in every worker can bounce ideas off it
+    name: str
+
+
+# How many bounces each idea went through, for the ideas returned to the Creators in this process
+hops_per_idea = Counter()
+
+
+# The agents registered in any worker runtime, as announced on AGENTS_TOPIC, kept as a list for
+# O(1) random choice and a set for O(1) membership
+live_agents: list[str] = []
+_live_agent_set: set[str] = set()
+
+
+def add_recipient(agent_name: str) -> None:
+    """Called once an agent is registered with a runtime, here or in another worker, so other agents can bounce ideas off it."""
+    if agent_name not in _live_agent_set:
+        _live_agent_set.add(agent_name)
+        live_agents.append(agent_name)
 
 
 def find_recipient() -> AgentId:
     try:
-        agent_files = glob.glob("agent*.py")
-        agent_names = [os.path.splitext(file)[0] for file in agent_files]
-        agent_names.remove("agent")
-        agent_name = random.choice(agent_names)
+        agent_name = random.choice(live_agents)
         print(f"Selecting agent for refinement: {agent_name}")
         return AgentId(agent_name, "default")
     except Exception as e:
@@ -0,0 +1,136 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Any, AsyncGenerator, Mapping, Sequence
+from autogen_core import CancellationToken
+from autogen_core.models import CreateResult, LLMMessage
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from dotenv import load_dotenv
+from openai import DefaultAsyncHttpxClient
+import httpx
+
+load_dotenv(override=True)
+
+# Every agent in a process talks to the model over one pool of keep-alive connections
+MAX_CONNECTIONS = int(os.getenv("AUTOGEN_MAX_CONNECTIONS", "20"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("AUTOGEN_MAX_CONCURRENT_REQUESTS", "20"))
+MAX_CONCURRENT_PER_AGENT = int(os.getenv("AUTOGEN_MAX_CONCURRENT_PER_AGENT", "2"))
+# Set to false to give each agent its own connection pool, as before, for comparison
+SHARE_CONNECTIONS = os.getenv("AUTOGEN_SHARE_CONNECTIONS", "true").lower() == "true"
+
+_http_client = None
+_request_slots = None
+
+
+def http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or not SHARE_CONNECTIONS:
+        limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+        _http_client = DefaultAsyncHttpxClient(limits=limits)
+    return _http_client
+
+
+def request_slots() -> asyncio.Semaphore:
+    global _request_slots
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return _request_slots
+
+
+class Usage:
+    """Requests and tokens by agent, for every model client made in this process."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.prompt_tokens = Counter()
+        self.completion_tokens = Counter()
+        self.waiting_seconds = 0.0
+
+    def record(self, agent_name: str, result: CreateResult) -> None:
+        self.requests[agent_name] += 1
+        self.prompt_tokens[agent_name] += result.usage.prompt_tokens
+        self.completion_tokens[agent_name] += result.usage.completion_tokens
+
+    def totals(self) -> dict:
+        return {
+            "requests": sum(self.requests.values()),
+            "prompt_tokens": sum(self.prompt_tokens.values()),
+            "completion_tokens": sum(self.completion_tokens.values()),
+            "waiting_seconds": self.waiting_seconds,
+        }
+
+
+usage = Usage()
+
+
+class SharedModelClient(OpenAIChatCompletionClient):
+    """
+    An OpenAIChatCompletionClient for one agent that uses the process's shared connection pool,
+    waits for a free slot under both the global and the per-agent concurrency caps, and records
+    its requests and tokens in usage.
+    """
+
+    def __init__(self, agent_name: str, max_concurrent: int = MAX_CONCURRENT_PER_AGENT, **kwargs):
+        super().__init__(http_client=http_client(), **kwargs)
+        self.agent_name = agent_name
+        self._agent_slots = asyncio.Semaphore(max_concurrent)
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await self._agent_slots.acquire()
+        try:
+            await request_slots().acquire()
+        except BaseException:
+            self._agent_slots.release()
+            raise
+        usage.waiting_seconds += loop.time() - start
+
+    def _release(self) -> None:
+        request_slots().release()
+        self._agent_slots.release()
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: bool | type | None = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: CancellationToken | None = None,
+    ) -> CreateResult:
+        await self._acquire()
+        try:
+            result = await super().create(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            )
+        finally:
+            self._release()
+        usage.record(self.agent_name, result)
+        return result
+
+    async def create_stream(self, messages: Sequence[LLMMessage], **kwargs) -> AsyncGenerator[str | CreateResult, None]:
+        await self._acquire()
+        try:
+            async for chunk in super().create_stream(messages, **kwargs):
+                if isinstance(chunk, CreateResult):
+                    usage.record(self.agent_name, chunk)
+                yield chunk
+        finally:
+            self._release()
+
+    async def close(self) -> None:
+        # The connection pool belongs to every agent in the process, so it stays open
+        if not SHARE_CONNECTIONS:
+            await super().close()
+
+
+def model_client(
+    agent_name: str, model: str = "gpt-4o-mini", temperature: float = 0.7, max_concurrent: int = MAX_CONCURRENT_PER_AGENT
+) -> SharedModelClient:
+    return SharedModelClient(agent_name, max_concurrent=max_concurrent, model=model, temperature=temperature)
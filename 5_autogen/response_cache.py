@@ -0,0 +1,61 @@
+import asyncio
+import functools
+import hashlib
+import os
+from collections import Counter, OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Agents answer a message they've already answered from memory, and share the answer to one that's in flight
+RESPONSE_CACHE = os.getenv("AUTOGEN_RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("AUTOGEN_RESPONSE_CACHE_SIZE", "1000"))
+
+stats = Counter()
+_responses = OrderedDict()
+_in_flight = {}
+
+
+def cached(handler):
+    """
+    Wrap a RoutedAgent message handler, under @message_handler, so that a message whose content
+    this agent type has answered before gets the same answer without calling the model, and one
+    that arrives while the same message is still being answered waits for that answer instead.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(self, message, ctx):
+        if not RESPONSE_CACHE:
+            return await handler(self, message, ctx)
+        # Hops only go up along a chain of bounces, so keying on them too means a message can never
+        # end up waiting on an earlier message in its own chain
+        key = hashlib.sha256(f"{self.id.type}\n{message.hops}\n{message.content}".encode()).hexdigest()
+        if key in _responses:
+            stats["hits"] += 1
+            _responses.move_to_end(key)
+            return _responses[key]
+        if key in _in_flight:
+            stats["coalesced"] += 1
+            return await asyncio.shield(_in_flight[key])
+        stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[key] = future
+        try:
+            response = await handler(self, message, ctx)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Whoever is waiting on this message gets the same error; mark it retrieved in case no one is
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del _in_flight[key]
+        future.set_result(response)
+        _responses[key] = response
+        if len(_responses) > RESPONSE_CACHE_SIZE:
+            _responses.popitem(last=False)
+        return response
+
+    return wrapper
@@ -2,39 +2,237 @@ from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntimeHost
 from agent import Agent
 from creator import Creator
 from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntime
-from autogen_core import AgentId
+from autogen_core import AgentId, try_get_known_serializers_for_type
 import messages
+import model_clients
+import response_cache
 import asyncio
+import argparse
+import json
+import os
+import multiprocessing
+import queue
+import time
+import uuid
+from collections import Counter
 
 HOW_MANY_AGENTS = 20
+HOW_MANY_WORKERS = 1
+HOST_ADDRESS = "localhost:50051"
+# How long a worker process has to start up, and to report its counters once told to stop
+WORKER_START_SECONDS = 60
+WORKER_STOP_SECONDS = 30
 
-async def create_and_message(worker, creator_id, i: int):
+
+class WorkerRuntime(GrpcWorkerAgentRuntime):
+    """
+    The host matches each response to its request by the worker it was sent to and the request id,
+    but each runtime numbers its requests from 1. With several runtimes sending to the same worker
+    the ids collide, so make them unique to this runtime.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._request_prefix = uuid.uuid4().hex[:8]
+
+    async def _get_new_request_id(self) -> str:
+        return f"{self._request_prefix}-{await super()._get_new_request_id()}"
+
+
+def creator_type(worker: int) -> str:
+    return f"Creator{worker}"
+
+
+async def create_and_message(worker, creator_id, i: int, finished: asyncio.Queue) -> bool:
     try:
         result = await worker.send_message(messages.Message(content=f"agent{i}.py"), creator_id)
-        with open(f"idea{i}.md", "w") as f:
-            f.write(result.content)
+        await finished.put((i, result))
+        return True
     except Exception as e:
         print(f"Failed to run worker {i} due to exception: {e}")
+        await finished.put((i, None))
+        return False
 
-async def main():
-    host = GrpcWorkerAgentRuntimeHost(address="localhost:50051")
-    host.start() 
-    worker = GrpcWorkerAgentRuntime(host_address="localhost:50051")
+
+def write_ideas_batch(batch: list, how_many_workers: int, jsonl_path: str | None) -> None:
+    """Write a batch of finished ideas, either to their own idea{i}.md or appended to the JSONL file with one fsync."""
+    if jsonl_path:
+        with open(jsonl_path, "a", encoding="utf-8") as f:
+            for i, idea in batch:
+                record = {"agent": f"agent{i}", "workers": how_many_workers, "hops": idea.hops, "idea": idea.content}
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        for i, idea in batch:
+            with open(f"idea{i}.md", "w", encoding="utf-8") as f:
+                f.write(idea.content)
+
+
+async def write_ideas(finished: asyncio.Queue, total: int, how_many_workers: int, jsonl_path: str | None) -> None:
+    """
+    The one writer of results. Ideas come off the queue as they finish; whatever has piled up
+    while the last batch was being written goes out together as the next batch, in a thread so
+    the event loop keeps delivering messages. Progress is printed after every batch.
+    """
+    start = time.time()
+    done = 0
+    written = 0
+    while done < total:
+        batch = [await finished.get()]
+        while not finished.empty():
+            batch.append(finished.get_nowait())
+        done += len(batch)
+        ideas = [(i, idea) for i, idea in batch if idea is not None]
+        if ideas:
+            await asyncio.to_thread(write_ideas_batch, ideas, how_many_workers, jsonl_path)
+            written += len(ideas)
+        elapsed = time.time() - start
+        print(f"Progress: {done}/{total} finished, {written} ideas written, {written / elapsed:.2f} ideas/sec")
+
+
+async def run_worker(index: int, ready, stop, results) -> None:
+    """One worker runtime: hosts a Creator, and every agent that Creator makes, until told to stop."""
+    worker = WorkerRuntime(host_address=HOST_ADDRESS)
     await worker.start()
-    result = await Creator.register(worker, "Creator", lambda: Creator("Creator"))
-    creator_id = AgentId("Creator", "default")
-    coroutines = [create_and_message(worker, creator_id, i) for i in range(1, HOW_MANY_AGENTS+1)]
-    await asyncio.gather(*coroutines)
+    name = creator_type(index)
+    await Creator.register(worker, name, lambda: Creator(name))
+    ready.set()
+    await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+    results.put((Creator.registered_at, model_clients.usage.totals(), response_cache.stats, messages.hops_per_idea))
+    await worker.stop()
+
+
+def worker_process(index: int, ready, stop, results) -> None:
+    asyncio.run(run_worker(index, ready, stop, results))
+
+
+async def wait_until_ready(processes: list, readies: list) -> None:
+    """Wait for every worker to register its Creator, raising if one dies or takes too long."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + WORKER_START_SECONDS
+    for process, ready in zip(processes, readies):
+        while not await loop.run_in_executor(None, ready.wait, 1):
+            if not process.is_alive():
+                raise RuntimeError(f"Worker {process.name} exited with code {process.exitcode} while starting")
+            if loop.time() > deadline:
+                raise RuntimeError(f"Worker {process.name} didn't start within {WORKER_START_SECONDS}s")
+
+
+async def collect_results(processes: list, results) -> list:
+    """
+    Each worker's counters, which it reports once told to stop. Waits off the event loop, and
+    gives up on workers that have all exited, or after WORKER_STOP_SECONDS, then stops any that
+    are still running.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + WORKER_STOP_SECONDS
+    collected = []
+    while len(collected) < len(processes) and loop.time() < deadline:
+        try:
+            collected.append(await loop.run_in_executor(None, results.get, True, 1))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+    if len(collected) < len(processes):
+        print(f"{len(processes) - len(collected)} of {len(processes)} workers didn't report their results")
+    for process in processes:
+        await loop.run_in_executor(None, process.join, max(0.0, deadline - loop.time()))
+        if process.is_alive():
+            process.terminate()
+    return collected
+
+
+async def run_world(how_many_workers: int, how_many_agents: int, jsonl_path: str | None = None) -> None:
+    """
+    Start the host, and how_many_workers worker runtimes in their own processes, each with its
+    own Creator. Agent creation is spread across the Creators in turn, so each new agent is
+    registered on, and runs in, the process of the Creator that made it.
+    """
+    host = GrpcWorkerAgentRuntimeHost(address=HOST_ADDRESS)
+    host.start()
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    results = context.Queue()
+    readies = [context.Event() for _ in range(how_many_workers)]
+    processes = [
+        context.Process(target=worker_process, args=(index, ready, stop, results))
+        for index, ready in enumerate(readies, start=1)
+    ]
+    for process in processes:
+        process.start()
     try:
-        await worker.stop()
+        await wait_until_ready(processes, readies)
+    except RuntimeError:
+        stop.set()
+        for process in processes:
+            process.terminate()
+        await host.stop()
+        raise
+
+    # The driver only sends messages; no agents run in this process
+    driver = WorkerRuntime(host_address=HOST_ADDRESS)
+    driver.add_message_serializer(try_get_known_serializers_for_type(messages.Message))
+    await driver.start()
+    start = time.time()
+    finished = asyncio.Queue()
+    writer = asyncio.create_task(write_ideas(finished, how_many_agents, how_many_workers, jsonl_path))
+    coroutines = [
+        create_and_message(driver, AgentId(creator_type((i - 1) % how_many_workers + 1), "default"), i, finished)
+        for i in range(1, how_many_agents + 1)
+    ]
+    ideas = sum(await asyncio.gather(*coroutines))
+    await writer
+    elapsed = time.time() - start
+
+    stop.set()
+    registered_at = {}
+    totals = Counter()
+    cache_stats = Counter()
+    hops_per_idea = Counter()
+    for report in await collect_results(processes, results):
+        worker_registered_at, worker_totals, worker_cache_stats, worker_hops = report
+        registered_at.update(worker_registered_at)
+        totals.update(worker_totals)
+        cache_stats.update(worker_cache_stats)
+        hops_per_idea.update(worker_hops)
+    agents_elapsed = max(registered_at.values(), default=start) - start
+    print(
+        f"{how_many_workers} workers: {len(registered_at)} agents in {agents_elapsed:.1f}s "
+        f"({len(registered_at) / agents_elapsed if agents_elapsed else 0:.2f} agents/sec), "
+        f"{ideas} ideas in {elapsed:.1f}s ({ideas / elapsed:.2f} ideas/sec)"
+    )
+    print(
+        f"  {totals['requests']} model requests, {totals['prompt_tokens']} prompt and "
+        f"{totals['completion_tokens']} completion tokens, {totals['waiting_seconds']:.1f}s waiting for a request slot"
+    )
+    handled = sum(cache_stats.values())
+    answered = sum(hops_per_idea.values())
+    print(
+        f"  {cache_stats['hits']} cache hits and {cache_stats['coalesced']} coalesced of {handled} agent messages; "
+        f"hops per idea: mean {sum(h * n for h, n in hops_per_idea.items()) / answered if answered else 0:.2f}, "
+        + ", ".join(f"{n} with {h}" for h, n in sorted(hops_per_idea.items()))
+    )
+    try:
+        await driver.stop()
         await host.stop()
     except Exception as e:
         print(e)
 
 
+async def main(workers: list[int], how_many_agents: int, jsonl_path: str | None = None):
+    if jsonl_path:
+        open(jsonl_path, "w").close()
+    for how_many_workers in workers:
+        await run_world(how_many_workers, how_many_agents, jsonl_path)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
-
+    parser = argparse.ArgumentParser(description="Create agents and collect their ideas, across worker processes")
+    parser.add_argument("--workers", type=int, nargs="*", default=[HOW_MANY_WORKERS],
+                        help="number of worker processes; give several to compare, e.g. --workers 1 2 4")
+    parser.add_argument("--agents", type=int, default=HOW_MANY_AGENTS)
+    parser.add_argument("--jsonl", metavar="PATH",
+                        help="write the ideas as JSON lines to PATH, instead of one idea{i}.md file each")
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.agents, args.jsonl))
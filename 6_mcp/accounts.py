@@ -1,9 +1,19 @@
 from pydantic import BaseModel
 import json
 from dotenv import load_dotenv
+import time
 from datetime import datetime
-from market import get_share_price
-from database import write_account, read_account, write_log
+from market import get_share_price, get_share_prices
+from database import (
+    write_account,
+    read_account,
+    write_account_summary,
+    write_trade,
+    write_portfolio_value,
+    delete_portfolio_values,
+    read_portfolio_values,
+    write_log,
+)
 
 load_dotenv(override=True)
 
@@ -31,7 +41,6 @@ class Account(BaseModel):
     strategy: str
     holdings: dict[str, int]
     transactions: list[Transaction]
-    portfolio_value_time_series: list[tuple[str, float]]
 
     @classmethod
     def get(cls, name: str):
@@ -43,13 +52,13 @@ class Account(BaseModel):
                 "strategy": "",
                 "holdings": {},
                 "transactions": [],
-                "portfolio_value_time_series": []
             }
             write_account(name, fields)
         return cls(**fields)
     
     
     def save(self):
+        """ Rewrite the whole account; trades, snapshots and strategy changes write only what changed. """
         write_account(self.name.lower(), self.model_dump())
 
     def reset(self, strategy: str):
@@ -57,8 +66,8 @@ class Account(BaseModel):
         self.strategy = strategy
         self.holdings = {}
         self.transactions = []
-        self.portfolio_value_time_series = []
         self.save()
+        delete_portfolio_values(self.name)
 
     def deposit(self, amount: float):
         """ Deposit funds into the account. """
@@ -66,7 +75,7 @@ class Account(BaseModel):
             raise ValueError("Deposit amount must be positive.")
         self.balance += amount
         print(f"Deposited ${amount}. New balance: ${self.balance}")
-        self.save()
+        write_account_summary(self.name, self.balance, self.strategy)
 
     def withdraw(self, amount: float):
         """ Withdraw funds from the account, ensuring it doesn't go negative. """
@@ -74,7 +83,7 @@ class Account(BaseModel):
             raise ValueError("Insufficient funds for withdrawal.")
         self.balance -= amount
         print(f"Withdrew ${amount}. New balance: ${self.balance}")
-        self.save()
+        write_account_summary(self.name, self.balance, self.strategy)
 
     def buy_shares(self, symbol: str, quantity: int, rationale: str) -> str:
         """ Buy shares of a stock if sufficient funds are available. """
@@ -96,7 +105,7 @@ class Account(BaseModel):
         
         # Update balance
         self.balance -= total_cost
-        self.save()
+        write_trade(self.name, self.balance, symbol, self.holdings[symbol], transaction.model_dump())
         write_log(self.name, "account", f"Bought {quantity} of {symbol}")
         return "Completed. Latest details:\n" + self.report()
 
@@ -122,15 +131,16 @@ class Account(BaseModel):
 
         # Update balance
         self.balance += total_proceeds
-        self.save()
+        write_trade(self.name, self.balance, symbol, self.holdings.get(symbol, 0), transaction.model_dump())
         write_log(self.name, "account", f"Sold {quantity} of {symbol}")
         return "Completed. Latest details:\n" + self.report()
 
     def calculate_portfolio_value(self):
         """ Calculate the total value of the user's portfolio. """
+        prices = get_share_prices(self.holdings.keys())
         total_value = self.balance
         for symbol, quantity in self.holdings.items():
-            total_value += get_share_price(symbol) * quantity
+            total_value += prices[symbol] * quantity
         return total_value
 
     def calculate_profit_loss(self, portfolio_value: float):
@@ -153,8 +163,7 @@ class Account(BaseModel):
     def report(self) -> str:
         """ Return a json string representing the account.  """
         portfolio_value = self.calculate_portfolio_value()
-        self.portfolio_value_time_series.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value))
-        self.save()
+        write_portfolio_value(self.name, int(time.time()), portfolio_value)
         pnl = self.calculate_profit_loss(portfolio_value)
         data = self.model_dump()
         data["total_portfolio_value"] = portfolio_value
@@ -162,6 +171,10 @@ class Account(BaseModel):
         write_log(self.name, "account", f"Retrieved account details")
         return json.dumps(data)
     
+    def get_portfolio_value_time_series(self, since: int = 0, max_points: int = 500) -> list[tuple[int, float]]:
+        """ Return (epoch seconds, value) points since the given time, downsampled to at most max_points where possible. """
+        return read_portfolio_values(self.name, since, max_points)
+
     def get_strategy(self) -> str:
         """ Return the strategy of the account """
         write_log(self.name, "account", f"Retrieved strategy")
@@ -170,7 +183,7 @@ class Account(BaseModel):
     def change_strategy(self, strategy: str) -> str:
         """ At your discretion, if you choose to, call this to change your investment strategy for the future """
         self.strategy = strategy
-        self.save()
+        write_account_summary(self.name, self.balance, self.strategy)
         write_log(self.name, "account", f"Changed strategy")
         return "Changed strategy"
 
@@ -1,10 +1,15 @@
 import gradio as gr
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
 from util import css, js, Color
 import pandas as pd
 from trading_floor import names, lastnames, short_model_names
 import plotly.express as px
 from accounts import Account
-from database import read_log
+from database import read_log_since
+from notifications import ChangeFeed, LOG, ACCOUNT
 
 mapper = {
     "trace": Color.WHITE,
@@ -15,6 +20,10 @@ mapper = {
     "account": Color.RED,
 }
 
+LOG_LINES = 13
+
+feed = ChangeFeed()
+
 
 class Trader:
     def __init__(self, name: str, lastname: str, model_name: str):
@@ -22,6 +31,9 @@ class Trader:
         self.lastname = lastname
         self.model_name = model_name
         self.account = Account.get(name)
+        self.log_lines = deque(maxlen=LOG_LINES)
+        self.last_log_id = 0
+        self.log_lock = threading.Lock()
 
     def reload(self):
         self.account = Account.get(self.name)
@@ -33,8 +45,8 @@ class Trader:
         return self.account.get_strategy()
 
     def get_portfolio_value_df(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.account.portfolio_value_time_series, columns=["datetime", "value"])
-        df["datetime"] = pd.to_datetime(df["datetime"])
+        df = pd.DataFrame(self.account.get_portfolio_value_time_series(), columns=["datetime", "value"])
+        df["datetime"] = pd.to_datetime(df["datetime"].map(datetime.fromtimestamp))
         return df
 
     def get_portfolio_value_chart(self):
@@ -81,12 +93,16 @@ class Trader:
         return f"<div style='text-align: center;background-color:{color};'><span style='font-size:32px'>${portfolio_value:,.0f}</span><span style='font-size:24px'>&nbsp;&nbsp;&nbsp;{emoji}&nbsp;${pnl:,.0f}</span></div>"
 
     def get_logs(self, previous=None) -> str:
-        logs = read_log(self.name, last_n=13)
-        response = ""
-        for log in logs:
-            timestamp, type, message = log
-            color = mapper.get(type, Color.WHITE).value
-            response += f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>"
+        with self.log_lock:
+            for log_id, timestamp, type, message in read_log_since(
+                self.name, self.last_log_id, last_n=LOG_LINES
+            ):
+                color = mapper.get(type, Color.WHITE).value
+                self.log_lines.append(
+                    f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>"
+                )
+                self.last_log_id = log_id
+            response = "".join(self.log_lines)
         response = f"<div style='height:250px; overflow-y:auto;'>{response}</div>"
         if response != previous:
             return response
@@ -133,27 +149,39 @@ class TraderView:
                     elem_classes=["dataframe-fix"],
                 )
 
-        timer = gr.Timer(value=120)
-        timer.tick(
-            fn=self.refresh,
-            inputs=[],
-            outputs=[
-                self.portfolio_value,
-                self.chart,
-                self.holdings_table,
-                self.transactions_table,
-            ],
-            show_progress="hidden",
-            queue=False,
-        )
-        log_timer = gr.Timer(value=0.5)
-        log_timer.tick(
-            fn=self.trader.get_logs,
-            inputs=[self.log],
-            outputs=[self.log],
-            show_progress="hidden",
-            queue=False,
-        )
+    def outputs(self):
+        return [
+            self.portfolio_value,
+            self.chart,
+            self.log,
+            self.holdings_table,
+            self.transactions_table,
+        ]
+
+    async def stream_updates(self):
+        """
+        Push updates to this panel as its trader's logs or account change, instead of polling.
+        An update that fails, say with the database locked, is logged and tried again on the
+        next change, rather than ending the stream and leaving the panel frozen.
+        """
+        failed = set()
+        async for kinds in feed.subscribe(self.trader.name):
+            kinds = set(kinds) | failed
+            failed = set()
+            log = value = chart = holdings = transactions = gr.update()
+            if LOG in kinds:
+                try:
+                    log = await asyncio.to_thread(self.trader.get_logs)
+                except Exception as e:
+                    print(f"Could not update the logs for {self.trader.name}: {e}")
+                    failed.add(LOG)
+            if ACCOUNT in kinds:
+                try:
+                    value, chart, holdings, transactions = await asyncio.to_thread(self.refresh)
+                except Exception as e:
+                    print(f"Could not update the account for {self.trader.name}: {e}")
+                    failed.add(ACCOUNT)
+            yield value, chart, log, holdings, transactions
 
     def refresh(self):
         self.trader.reload()
@@ -181,6 +209,13 @@ def create_ui():
         with gr.Row():
             for trader_view in trader_views:
                 trader_view.make_ui()
+        for trader_view in trader_views:
+            ui.load(
+                fn=trader_view.stream_updates,
+                outputs=trader_view.outputs(),
+                show_progress="hidden",
+                concurrency_limit=None,
+            )
 
     return ui
 
@@ -0,0 +1,65 @@
+"""
+Time accounts server resource reads: spawning a fresh server per call, as accounts_client.py
+used to, versus the pooled server, cold (first call starts the server) and warm.
+
+    uv run benchmark_accounts_client.py --calls 10
+    uv run benchmark_accounts_client.py --command python --args accounts_server.py
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import mcp
+from mcp import StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from mcp_pool import MCPServerPool
+
+
+async def read_with_fresh_server(params: StdioServerParameters, name: str) -> str:
+    async with stdio_client(params) as streams:
+        async with mcp.ClientSession(*streams) as session:
+            await session.initialize()
+            result = await session.read_resource(f"accounts://strategy/{name}")
+            return result.contents[0].text
+
+
+async def timed(coroutine) -> float:
+    start = time.perf_counter()
+    await coroutine
+    return (time.perf_counter() - start) * 1000
+
+
+async def main(params: StdioServerParameters, calls: int, name: str):
+    spawn = [await timed(read_with_fresh_server(params, name)) for _ in range(calls)]
+
+    pool = MCPServerPool()
+    pooled = {"command": params.command, "args": params.args}
+
+    def read(session):
+        return session.read_resource(f"accounts://strategy/{name}")
+
+    cold = await timed(pool.call(pooled, read))
+    warm = [await timed(pool.call(pooled, read)) for _ in range(calls)]
+    start = time.perf_counter()
+    await asyncio.gather(*[pool.call(pooled, read) for _ in range(calls)])
+    concurrent = (time.perf_counter() - start) * 1000
+    await pool.close()
+
+    print(f"spawn per call:  median {statistics.median(spawn):8.1f} ms")
+    print(f"pooled cold:            {cold:8.1f} ms")
+    print(f"pooled warm:     median {statistics.median(warm):8.1f} ms")
+    print(f"pooled {calls} concurrent: {concurrent:8.1f} ms total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--name", default="warren")
+    parser.add_argument("--command", default="uv")
+    parser.add_argument("--args", nargs="*", default=["run", "accounts_server.py"])
+    args = parser.parse_args()
+    server = StdioServerParameters(command=args.command, args=args.args, env=None)
+    asyncio.run(main(server, args.calls, args.name))
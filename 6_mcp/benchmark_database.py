@@ -0,0 +1,121 @@
+"""
+Micro-benchmark for the accounts.db connection layer.
+
+Runs the same mix of account, log and market calls from several concurrent "traders"
+(one thread each), first with a fresh sqlite3.connect + commit per call as database.py
+used to do, then with the pooled per-thread connections, and prints ops/sec for both.
+
+    uv run benchmark_database.py --traders 4 --ops 2000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+
+def connect_per_call_ops(db: str):
+    """The original implementation: a new connection and commit for every call."""
+
+    def write_account(name, account_dict):
+        with sqlite3.connect(db) as conn:
+            conn.execute(
+                "INSERT INTO accounts (name, account) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET account=excluded.account",
+                (name.lower(), json.dumps(account_dict)),
+            )
+            conn.commit()
+
+    def read_account(name):
+        with sqlite3.connect(db) as conn:
+            row = conn.execute(
+                "SELECT account FROM accounts WHERE name = ?", (name.lower(),)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def write_log(name, type, message):
+        with sqlite3.connect(db) as conn:
+            conn.execute(
+                "INSERT INTO logs (name, datetime, type, message) VALUES (?, datetime('now'), ?, ?)",
+                (name.lower(), type, message),
+            )
+            conn.commit()
+
+    def read_log(name, last_n=10):
+        with sqlite3.connect(db) as conn:
+            cursor = conn.execute(
+                "SELECT datetime, type, message FROM logs WHERE name = ? "
+                "ORDER BY datetime DESC LIMIT ?",
+                (name.lower(), last_n),
+            )
+            return reversed(cursor.fetchall())
+
+    return write_account, read_account, write_log, read_log
+
+
+def pooled_ops():
+    return database.write_account, database.read_account, database.write_log, database.read_log
+
+
+def trader_workload(name: str, ops: int, calls) -> int:
+    write_account, read_account, write_log, read_log = calls
+    account = {
+        "name": name,
+        "balance": 10_000.0,
+        "strategy": "",
+        "holdings": {},
+        "transactions": [],
+        "portfolio_value_time_series": [],
+    }
+    done = 0
+    # A trading cycle is dominated by tracer log writes, with the odd account save and read
+    for i in range(ops // 4):
+        write_log(name, "span", f"Started function {i}")
+        write_log(name, "span", f"Ended function {i}")
+        account["balance"] -= 1
+        write_account(name, account)
+        read_account(name)
+        done += 4
+    read_log(name, last_n=13)
+    return done + 1
+
+
+def run(label: str, traders: int, ops: int, calls) -> float:
+    names = [f"trader{i}" for i in range(traders)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=traders) as pool:
+        total = sum(pool.map(lambda name: trader_workload(name, ops, calls), names))
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed
+    print(f"{label:<20} {total:>8} ops in {elapsed:6.2f}s  {rate:>10,.0f} ops/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traders", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=2000, help="operations per trader")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The baseline gets its own file with sqlite's default rollback journal
+        baseline_db = os.path.join(tmp, "baseline.db")
+        with sqlite3.connect(baseline_db) as conn:
+            database._create_tables(conn)
+
+        database.close_connection()
+        database.DB = os.path.join(tmp, "pooled.db")
+
+        before = run("connect-per-call", args.traders, args.ops, connect_per_call_ops(baseline_db))
+        after = run("pooled", args.traders, args.ops, pooled_ops())
+        print(f"speedup: {after / before:.1f}x")
+        database.close_connection()
+
+
+if __name__ == "__main__":
+    main()
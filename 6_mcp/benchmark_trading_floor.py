@@ -0,0 +1,216 @@
+"""
+Offline replay benchmark for the trading floor.
+
+Runs N simulated traders through Trader.run for a number of cycles with no network:
+the model is a local stub that makes a fixed script of tool calls (look up a price,
+buy, check holdings), prices come from a recorded JSON file of {symbol: price}, and
+the researcher's fetch, search and memory servers are left out. The accounts and
+market MCP servers, the accounts client and the database are the real ones, running
+against a temporary accounts database.
+
+    uv run benchmark_trading_floor.py --traders 4 --cycles 5
+    uv run benchmark_trading_floor.py --prices recorded_prices.json
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# The database path has to be set before database.py is imported, here and in the MCP servers
+workdir = tempfile.mkdtemp(prefix="trading_floor_bench_")
+atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+os.environ["ACCOUNTS_DB"] = os.path.join(workdir, "accounts.db")
+
+from agents import Model, ModelResponse, TracingProcessor, Usage, set_trace_processors
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+)
+
+import accounts_client
+import database
+import traders
+from mcp_pool import server_pool
+from tracers import LogTracer
+
+DEFAULT_PRICES = {
+    "AAPL": 201.5, "MSFT": 470.2, "NVDA": 141.9, "AMZN": 212.1, "GOOGL": 175.3,
+    "META": 690.4, "TSLA": 320.7, "BRK.B": 480.0, "JPM": 265.8, "IBIT": 61.2,
+}
+
+
+class ScriptedModel(Model):
+    """A deterministic stand-in for the LLM: look up a price, buy one share, check holdings, finish."""
+
+    def __init__(self, trader_name: str, symbols: list[str]):
+        self.trader_name = trader_name
+        self.symbols = symbols
+        self.rng = random.Random(trader_name)
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, **kwargs) -> ModelResponse:
+        step = sum(1 for item in input if isinstance(item, dict) and item.get("type") == "function_call_output")
+        if step == 0:
+            self.symbol = self.rng.choice(self.symbols)
+            output = [self.tool_call("lookup_share_price", {"symbol": self.symbol})]
+        elif step == 1:
+            args = {"name": self.trader_name, "symbol": self.symbol, "quantity": 1, "rationale": "Benchmark"}
+            output = [self.tool_call("buy_shares", args)]
+        elif step == 2:
+            output = [self.tool_call("get_holdings", {"name": self.trader_name})]
+        else:
+            output = [self.message("Bought one share as planned.")]
+        return ModelResponse(output=output, usage=Usage(), response_id=None)
+
+    async def stream_response(self, *args, **kwargs):
+        # Trader.run doesn't stream, but if it did, the whole scripted turn arrives as one event
+        output = (await self.get_response(*args, **kwargs)).output
+        response = Response(
+            id="scripted", created_at=time.time(), model="scripted", object="response", output=output,
+            parallel_tool_calls=False, tool_choice="auto", tools=[],
+        )
+        yield ResponseCompletedEvent(type="response.completed", response=response, sequence_number=0)
+
+    def tool_call(self, name: str, args: dict) -> ResponseFunctionToolCall:
+        call_id = f"call_{self.rng.getrandbits(48):x}"
+        return ResponseFunctionToolCall(
+            id=f"fc_{call_id}", call_id=call_id, name=name, arguments=json.dumps(args),
+            type="function_call", status="completed",
+        )
+
+    def message(self, text: str) -> ResponseOutputMessage:
+        return ResponseOutputMessage(
+            id=f"msg_{self.rng.getrandbits(48):x}", role="assistant", status="completed", type="message",
+            content=[ResponseOutputText(text=text, type="output_text", annotations=[])],
+        )
+
+
+class ToolLatencyTracer(TracingProcessor):
+    """Collects the duration of every function (tool call) span."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+
+    def on_span_end(self, span) -> None:
+        if span.span_data and span.span_data.type == "function" and span.started_at and span.ended_at:
+            elapsed = datetime.fromisoformat(span.ended_at) - datetime.fromisoformat(span.started_at)
+            self.latencies.append(elapsed.total_seconds() * 1000)
+
+    def on_trace_start(self, trace) -> None:
+        pass
+
+    def on_trace_end(self, trace) -> None:
+        pass
+
+    def on_span_start(self, span) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+def trader_names(count: int) -> list[str]:
+    # Names must not contain a 0, which LogTracer uses to find the trader in the trace id
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return [f"Trader{letters[i // 26 - 1] if i >= 26 else ''}{letters[i % 26]}" for i in range(count)]
+
+
+def record_prices(prices: dict[str, float]) -> None:
+    """Make the recorded prices the answer on both the end-of-day and the snapshot paths."""
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    database.write_market(today, prices)
+    database.write_cached_prices(prices, time.time() + 365 * 24 * 60 * 60)
+
+
+def count_rows() -> dict[str, int]:
+    with sqlite3.connect(database.DB) as conn:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ["logs", "transactions", "portfolio_points"]
+        }
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+async def main(trader_count: int, cycles: int, prices: dict[str, float]):
+    env = {"ACCOUNTS_DB": os.environ["ACCOUNTS_DB"], "POLYGON_API_KEY": "recorded", "POLYGON_PLAN": ""}
+    accounts_params = {"command": sys.executable, "args": ["accounts_server.py"], "env": env}
+    market_params = {"command": sys.executable, "args": ["market_server.py"], "env": env}
+
+    traders.trader_mcp_server_params = [accounts_params, market_params]
+    traders.researcher_mcp_server_params = lambda name: []
+    traders.get_model = lambda model_name: ScriptedModel(model_name.removeprefix("stub:"), list(prices))
+    accounts_client.params = accounts_params
+
+    log_tracer = LogTracer()
+    latency_tracer = ToolLatencyTracer()
+    set_trace_processors([log_tracer, latency_tracer])
+
+    record_prices(prices)
+    names = trader_names(trader_count)
+    floor = [traders.Trader(name, model_name=f"stub:{name.lower()}") for name in names]
+    before = count_rows()
+
+    cycle_seconds = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        await asyncio.gather(*[trader.run() for trader in floor])
+        cycle_seconds.append(time.perf_counter() - start)
+
+    log_tracer.force_flush()
+    after = count_rows()
+    spawn_seconds = sum(stats.total_startup_seconds for stats in server_pool.stats.values())
+    runs = trader_count * cycles
+    warm = cycle_seconds[1:] or cycle_seconds
+
+    print(f"traders: {trader_count}, cycles: {cycles}, trader runs: {runs}")
+    print(f"first cycle (includes MCP startup): {cycle_seconds[0]:.2f}s")
+    print(f"warm cycles/sec: {len(warm) / sum(warm):.2f}  ({trader_count * len(warm) / sum(warm):.2f} trader runs/sec)")
+    print(f"MCP server startup: {spawn_seconds:.2f}s total across {len(server_pool.stats)} servers")
+    print(f"trades recorded: {after['transactions'] - before['transactions']} of {runs}")
+    print("db rows written: " + ", ".join(f"{table} {after[table] - before[table]}" for table in after))
+    print(f"log writer: {log_tracer.writer.metrics}")
+    print(
+        f"tool latency over {len(latency_tracer.latencies)} calls: "
+        f"p50 {percentile(latency_tracer.latencies, 50):.1f}ms, "
+        f"p99 {percentile(latency_tracer.latencies, 99):.1f}ms, "
+        f"mean {statistics.fmean(latency_tracer.latencies or [0]):.1f}ms"
+    )
+
+    await server_pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traders", type=int, default=4)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--prices", help="JSON file of recorded {symbol: price}")
+    args = parser.parse_args()
+    if args.prices:
+        with open(args.prices) as f:
+            recorded = json.load(f)
+    else:
+        recorded = DEFAULT_PRICES
+    print(f"Using scratch database {os.environ['ACCOUNTS_DB']}")
+    asyncio.run(main(args.traders, args.cycles, recorded))
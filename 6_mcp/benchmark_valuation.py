@@ -0,0 +1,81 @@
+"""
+Benchmark portfolio valuation for portfolios of 10, 100 and 1000 holdings.
+
+Prices come from a local stub: a day of end-of-day prices written into a temporary
+accounts database, so no Polygon calls are made. Each size is valued by looking up
+prices one symbol at a time, as Account.calculate_portfolio_value used to, and with
+the bulk get_share_prices lookup it uses now.
+
+    uv run benchmark_valuation.py --repeats 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import database
+import market
+from accounts import Account
+
+SIZES = [10, 100, 1000]
+
+
+def stub_prices(count: int) -> dict[str, float]:
+    rng = random.Random(42)
+    return {f"SYM{i:04d}": round(rng.uniform(1, 500), 2) for i in range(count)}
+
+
+def per_symbol_value(account: Account) -> float:
+    total_value = account.balance
+    for symbol, quantity in account.holdings.items():
+        total_value += market.get_share_price(symbol) * quantity
+    return total_value
+
+
+def time_ms(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.close_connection()
+        database.DB = os.path.join(tmp, "bench.db")
+        market.polygon_api_key = "stub"
+        market.is_paid_polygon = False
+
+        prices = stub_prices(max(SIZES))
+        today = datetime.now().date().strftime("%Y-%m-%d")
+        database.write_market(today, prices)
+
+        print(f"{'holdings':>8} {'per-symbol ms':>14} {'bulk ms':>10} {'speedup':>8}")
+        for size in SIZES:
+            holdings = {symbol: 10 for symbol in list(prices)[:size]}
+            account = Account(
+                name="bench",
+                balance=10_000.0,
+                strategy="",
+                holdings=holdings,
+                transactions=[],
+            )
+            assert abs(per_symbol_value(account) - account.calculate_portfolio_value()) < 1e-6
+            before = time_ms(lambda: per_symbol_value(account), args.repeats)
+            after = time_ms(account.calculate_portfolio_value, args.repeats)
+            print(f"{size:>8} {before:>14.2f} {after:>10.2f} {before / after:>7.1f}x")
+        database.close_connection()
+
+
+if __name__ == "__main__":
+    main()
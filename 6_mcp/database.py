@@ -1,101 +1,534 @@
 import sqlite3
 import json
+import os
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
+from notifications import publish, LOG, ACCOUNT
 
 load_dotenv(override=True)
 
-DB = "accounts.db"
+DB = os.getenv("ACCOUNTS_DB", "accounts.db")
 
+# Tuning for the connection layer; every process (trading floor, MCP servers, dashboard)
+# shares accounts.db, so WAL lets readers carry on while a trader is writing
 
-with sqlite3.connect(DB) as conn:
-    cursor = conn.cursor()
-    cursor.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            datetime DATETIME,
-            type TEXT,
-            message TEXT
-        )
-    ''')
-    cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
-    conn.commit()
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+CACHED_STATEMENTS = 128
 
-def write_account(name, account_dict):
-    json_data = json.dumps(account_dict)
-    with sqlite3.connect(DB) as conn:
+_local = threading.local()
+
+
+# Portfolio values are kept at several resolutions, in seconds: every raw point (0), appended
+# to portfolio_points, and the latest value in each minute and each hour, in portfolio_values.
+# Timestamps are epoch seconds, and each write appends the point and upserts one row per
+# coarser tier, so those are always up to date.
+
+PORTFOLIO_RESOLUTIONS = [0, 60, 3600]
+MAX_CHART_POINTS = 500
+
+INSERT_PORTFOLIO_POINT = 'INSERT INTO portfolio_points (name, timestamp, value) VALUES (?, ?, ?)'
+
+UPSERT_PORTFOLIO_VALUE = '''
+    INSERT INTO portfolio_values (name, resolution, bucket, value)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(name, resolution, bucket) DO UPDATE SET value=excluded.value
+'''
+
+READ_PORTFOLIO_POINTS = '''
+    SELECT timestamp, value FROM portfolio_points
+    WHERE name = :name AND timestamp >= :since
+    ORDER BY timestamp, id
+'''
+
+READ_PORTFOLIO_VALUES = '''
+    SELECT bucket, value FROM portfolio_values
+    WHERE name = :name AND resolution = :resolution AND bucket >= :since
+    ORDER BY bucket
+'''
+
+def _epoch(when: str) -> int:
+    return int(datetime.strptime(when, "%Y-%m-%d %H:%M:%S").timestamp())
+
+def _portfolio_value_rows(name: str, timestamp: int, value: float) -> list[tuple]:
+    return [
+        (name.lower(), resolution, timestamp - timestamp % resolution, value)
+        for resolution in PORTFOLIO_RESOLUTIONS
+        if resolution
+    ]
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    with conn:
         cursor = conn.cursor()
+        cursor.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
         cursor.execute('''
-            INSERT INTO accounts (name, account)
-            VALUES (?, ?)
-            ON CONFLICT(name) DO UPDATE SET account=excluded.account
-        ''', (name.lower(), json_data))
-        conn.commit()
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                datetime DATETIME,
+                type TEXT,
+                message TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_name_id ON logs (name, id)')
+        cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS market_prices (
+                date TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (date, symbol)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_cache (
+                symbol TEXT PRIMARY KEY,
+                price REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trader_accounts (
+                name TEXT PRIMARY KEY,
+                balance REAL NOT NULL,
+                strategy TEXT NOT NULL DEFAULT ''
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS holdings (
+                name TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                PRIMARY KEY (name, symbol)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                price REAL NOT NULL,
+                timestamp TEXT NOT NULL,
+                rationale TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_name ON transactions (name, id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS portfolio_points (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                value REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_portfolio_points_name ON portfolio_points (name, timestamp)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS portfolio_values (
+                name TEXT NOT NULL,
+                resolution INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (name, resolution, bucket)
+            ) WITHOUT ROWID
+        ''')
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        DB, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=CACHED_STATEMENTS
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    _create_tables(conn)
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return the long-lived connection for the current thread, opening it on first use.
+
+    Connections are kept per thread and per process, so a forked MCP server never
+    reuses its parent's handle. Because the SQL strings below are constants, sqlite3's
+    statement cache means each one is only prepared once per connection.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.db != DB:
+        conn = _connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.db = DB
+    return conn
+
+
+def close_connection() -> None:
+    """Close the current thread's connection, if it has one."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
+
+def _chunks(items: list, size: int = 500):
+    # Keeps IN (...) lists under SQLite's limit on bound parameters
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+get_connection()
+
+
+# Accounts are stored across trader_accounts, holdings, transactions and the portfolio tables,
+# so a trade appends one transaction row instead of rewriting the whole account.
+# The original accounts table, one JSON blob per trader, is only read for migration.
+
+def write_account(name, account_dict):
+    """
+    Replace everything stored for an account with the contents of account_dict.
+    The portfolio value time series is only replaced if account_dict includes one,
+    as legacy JSON accounts do.
+
+    Args:
+        name (str): The account name
+        account_dict (dict): The account fields, as produced by Account.model_dump()
+    """
+    name = name.lower()
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO trader_accounts (name, balance, strategy)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET balance=excluded.balance, strategy=excluded.strategy
+        ''', (name, account_dict["balance"], account_dict["strategy"]))
+        conn.execute('DELETE FROM holdings WHERE name = ?', (name,))
+        conn.executemany(
+            'INSERT INTO holdings (name, symbol, quantity) VALUES (?, ?, ?)',
+            [(name, symbol, quantity) for symbol, quantity in account_dict["holdings"].items()],
+        )
+        conn.execute('DELETE FROM transactions WHERE name = ?', (name,))
+        conn.executemany('''
+            INSERT INTO transactions (name, symbol, quantity, price, timestamp, rationale)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (name, t["symbol"], t["quantity"], t["price"], t["timestamp"], t["rationale"])
+            for t in account_dict["transactions"]
+        ])
+        if "portfolio_value_time_series" in account_dict:
+            conn.execute('DELETE FROM portfolio_points WHERE name = ?', (name,))
+            conn.execute('DELETE FROM portfolio_values WHERE name = ?', (name,))
+            conn.executemany(INSERT_PORTFOLIO_POINT, [
+                (name, _epoch(when), value) for when, value in account_dict["portfolio_value_time_series"]
+            ])
+            conn.executemany(UPSERT_PORTFOLIO_VALUE, [
+                row
+                for when, value in account_dict["portfolio_value_time_series"]
+                for row in _portfolio_value_rows(name, _epoch(when), value)
+            ])
+    publish(name, ACCOUNT)
 
 def read_account(name):
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT account FROM accounts WHERE name = ?', (name.lower(),))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
-    
+    """
+    Read an account back into the dict shape used by Account, or None if it doesn't exist.
+    An account still held in the legacy JSON table is migrated the first time it is read.
+    """
+    name = name.lower()
+    conn = get_connection()
+    row = conn.execute('SELECT balance, strategy FROM trader_accounts WHERE name = ?', (name,)).fetchone()
+    if not row:
+        legacy = _read_legacy_account(name)
+        if legacy:
+            write_account(name, legacy)
+        return legacy
+    holdings = conn.execute(
+        'SELECT symbol, quantity FROM holdings WHERE name = ? ORDER BY rowid', (name,)
+    ).fetchall()
+    transactions = conn.execute('''
+        SELECT symbol, quantity, price, timestamp, rationale FROM transactions
+        WHERE name = ? ORDER BY id
+    ''', (name,)).fetchall()
+    return {
+        "name": name,
+        "balance": row[0],
+        "strategy": row[1],
+        "holdings": dict(holdings),
+        "transactions": [
+            {"symbol": s, "quantity": q, "price": p, "timestamp": ts, "rationale": r}
+            for s, q, p, ts, r in transactions
+        ],
+    }
+
+def write_account_summary(name: str, balance: float, strategy: str) -> None:
+    """Update just the balance and strategy of an account."""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO trader_accounts (name, balance, strategy)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET balance=excluded.balance, strategy=excluded.strategy
+        ''', (name.lower(), balance, strategy))
+    publish(name, ACCOUNT)
+
+def write_trade(name: str, balance: float, symbol: str, holding: int, transaction: dict) -> None:
+    """
+    Record a buy or sell in one database transaction: append the transaction row,
+    upsert the holding (removing it when it reaches zero) and update the balance.
+
+    Args:
+        name (str): The account name
+        balance (float): The cash balance after the trade
+        symbol (str): The symbol traded
+        holding (int): The quantity of symbol held after the trade
+        transaction (dict): The Transaction fields
+    """
+    name = name.lower()
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO transactions (name, symbol, quantity, price, timestamp, rationale)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (name, transaction["symbol"], transaction["quantity"], transaction["price"],
+              transaction["timestamp"], transaction["rationale"]))
+        if holding:
+            conn.execute('''
+                INSERT INTO holdings (name, symbol, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(name, symbol) DO UPDATE SET quantity=excluded.quantity
+            ''', (name, symbol, holding))
+        else:
+            conn.execute('DELETE FROM holdings WHERE name = ? AND symbol = ?', (name, symbol))
+        conn.execute('UPDATE trader_accounts SET balance = ? WHERE name = ?', (balance, name))
+    publish(name, ACCOUNT)
+
+def write_portfolio_value(name: str, timestamp: int, value: float) -> None:
+    """Append one point, at epoch seconds timestamp, to an account's portfolio value time series."""
+    conn = get_connection()
+    with conn:
+        conn.execute(INSERT_PORTFOLIO_POINT, (name.lower(), timestamp, value))
+        conn.executemany(UPSERT_PORTFOLIO_VALUE, _portfolio_value_rows(name, timestamp, value))
+    publish(name, ACCOUNT)
+
+def delete_portfolio_values(name: str) -> None:
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM portfolio_points WHERE name = ?', (name.lower(),))
+        conn.execute('DELETE FROM portfolio_values WHERE name = ?', (name.lower(),))
+    publish(name, ACCOUNT)
+
+def read_portfolio_values(name: str, since: int = 0, max_points: int = MAX_CHART_POINTS):
+    """
+    Read an account's portfolio value time series at the finest resolution that fits.
+
+    Args:
+        name (str): The account name
+        since (int): Only return points at or after this epoch time
+        max_points (int): Use the finest tier with no more than this many points since then,
+            or the coarsest tier if none is small enough
+
+    Returns:
+        list: A list of tuples containing (epoch seconds, value), oldest first
+    """
+    conn = get_connection()
+    for resolution in PORTFOLIO_RESOLUTIONS:
+        query = READ_PORTFOLIO_VALUES if resolution else READ_PORTFOLIO_POINTS
+        params = {"name": name.lower(), "resolution": resolution, "since": since}
+        count = conn.execute(f'SELECT COUNT(*) FROM ({query})', params).fetchone()[0]
+        if count <= max_points:
+            break
+    return conn.execute(query, params).fetchall()
+
+def _read_legacy_account(name):
+    conn = get_connection()
+    row = conn.execute('SELECT account FROM accounts WHERE name = ?', (name.lower(),)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def migrate_legacy_accounts() -> list[str]:
+    """
+    Copy every account from the legacy JSON accounts table into the normalized tables,
+    skipping any that have already been migrated.
+
+    Returns:
+        list: The names of the accounts that were migrated
+    """
+    conn = get_connection()
+    rows = conn.execute('''
+        SELECT name, account FROM accounts
+        WHERE name NOT IN (SELECT name FROM trader_accounts)
+    ''').fetchall()
+    for name, account in rows:
+        write_account(name, json.loads(account))
+    return [name for name, _ in rows]
+
 def write_log(name: str, type: str, message: str):
     """
     Write a log entry to the logs table.
-    
+
     Args:
         name (str): The name associated with the log
         type (str): The type of log entry
         message (str): The log message
     """
-    now = datetime.now().isoformat()
-    
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
+    conn = get_connection()
+    with conn:
+        conn.execute('''
             INSERT INTO logs (name, datetime, type, message)
             VALUES (?, datetime('now'), ?, ?)
         ''', (name.lower(), type, message))
-        conn.commit()
+    publish(name, LOG)
+
+def write_logs(records: list[tuple[str, str, str, str]]) -> None:
+    """
+    Write a batch of log entries in a single transaction.
+
+    Args:
+        records (list): Tuples of (name, datetime, type, message), with datetime
+            in the same UTC 'YYYY-MM-DD HH:MM:SS' format that write_log stores
+    """
+    conn = get_connection()
+    with conn:
+        conn.executemany('''
+            INSERT INTO logs (name, datetime, type, message)
+            VALUES (?, ?, ?, ?)
+        ''', [(name.lower(), when, type, message) for name, when, type, message in records])
+    for name in {record[0].lower() for record in records}:
+        publish(name, LOG)
 
 def read_log(name: str, last_n=10):
     """
     Read the most recent log entries for a given name.
-    
+
     Args:
         name (str): The name to retrieve logs for
         last_n (int): Number of most recent entries to retrieve
-        
+
     Returns:
         list: A list of tuples containing (datetime, type, message)
     """
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT datetime, type, message FROM logs 
-            WHERE name = ? 
-            ORDER BY datetime DESC
-            LIMIT ?
-        ''', (name.lower(), last_n))
-        
-        return reversed(cursor.fetchall())
+    conn = get_connection()
+    cursor = conn.execute('''
+        SELECT datetime, type, message FROM logs
+        WHERE name = ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (name.lower(), last_n))
+    return reversed(cursor.fetchall())
+
+def read_log_since(name: str, after_id: int = 0, last_n=10):
+    """
+    Read the most recent log entries for a given name that are newer than after_id.
+    Pass the id of the last entry already seen to fetch only what has been added since;
+    this is an index range scan on (name, id), so it costs the same however big logs gets.
+
+    Args:
+        name (str): The name to retrieve logs for
+        after_id (int): Only return entries with an id greater than this
+        last_n (int): The maximum number of entries to retrieve
+
+    Returns:
+        list: A list of tuples containing (id, datetime, type, message), oldest first
+    """
+    conn = get_connection()
+    cursor = conn.execute('''
+        SELECT id, datetime, type, message FROM logs
+        WHERE name = ? AND id > ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (name.lower(), after_id, last_n))
+    return cursor.fetchall()[::-1]
+
+# End of day prices are stored one row per (date, symbol) so a lookup reads a single row;
+# the market table of one JSON blob per date is only read for dates stored before that.
 
 def write_market(date: str, data: dict) -> None:
-    data_json = json.dumps(data)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO market (date, data)
-            VALUES (?, ?)
-            ON CONFLICT(date) DO UPDATE SET data=excluded.data
-        ''', (date, data_json))
-        conn.commit()
+    conn = get_connection()
+    with conn:
+        conn.executemany('''
+            INSERT INTO market_prices (date, symbol, price)
+            VALUES (?, ?, ?)
+            ON CONFLICT(date, symbol) DO UPDATE SET price=excluded.price
+        ''', [(date, symbol, price) for symbol, price in data.items() if price is not None])
 
 def read_market(date: str) -> dict | None:
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT data FROM market WHERE date = ?', (date,))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
\ No newline at end of file
+    conn = get_connection()
+    rows = conn.execute('SELECT symbol, price FROM market_prices WHERE date = ?', (date,)).fetchall()
+    if rows:
+        return dict(rows)
+    return _migrate_legacy_market(date)
+
+def has_market(date: str) -> bool:
+    """Whether prices have been stored for this date."""
+    conn = get_connection()
+    row = conn.execute('SELECT 1 FROM market_prices WHERE date = ? LIMIT 1', (date,)).fetchone()
+    return row is not None
+
+def read_market_price(date: str, symbol: str) -> float | None:
+    """The stored price of one symbol on this date, or None if there isn't one."""
+    conn = get_connection()
+    row = conn.execute(
+        'SELECT price FROM market_prices WHERE date = ? AND symbol = ?', (date, symbol)
+    ).fetchone()
+    return row[0] if row else None
+
+def read_market_prices(date: str, symbols: list[str]) -> dict[str, float]:
+    """The stored prices on this date for whichever of the symbols have one."""
+    conn = get_connection()
+    prices = {}
+    for chunk in _chunks(symbols):
+        placeholders = ", ".join("?" * len(chunk))
+        prices.update(conn.execute(
+            f'SELECT symbol, price FROM market_prices WHERE date = ? AND symbol IN ({placeholders})',
+            (date, *chunk),
+        ).fetchall())
+    return prices
+
+def _migrate_legacy_market(date: str) -> dict | None:
+    conn = get_connection()
+    row = conn.execute('SELECT data FROM market WHERE date = ?', (date,)).fetchone()
+    if not row:
+        return None
+    data = json.loads(row[0])
+    write_market(date, data)
+    return data
+
+def write_cached_price(symbol: str, price: float, updated: float) -> None:
+    """Store the latest price for a symbol, fetched at the epoch time updated."""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO price_cache (symbol, price, updated)
+            VALUES (?, ?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET price=excluded.price, updated=excluded.updated
+        ''', (symbol, price, updated))
+
+def write_cached_prices(prices: dict[str, float], updated: float) -> None:
+    """Store the latest prices for several symbols, all fetched at the epoch time updated."""
+    conn = get_connection()
+    with conn:
+        conn.executemany('''
+            INSERT INTO price_cache (symbol, price, updated)
+            VALUES (?, ?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET price=excluded.price, updated=excluded.updated
+        ''', [(symbol, price, updated) for symbol, price in prices.items()])
+
+def read_cached_prices(symbols: list[str], not_before: float) -> dict[str, float]:
+    """The cached prices of whichever of the symbols were fetched at or after not_before."""
+    conn = get_connection()
+    prices = {}
+    for chunk in _chunks(symbols):
+        placeholders = ", ".join("?" * len(chunk))
+        prices.update(conn.execute(
+            f'SELECT symbol, price FROM price_cache WHERE symbol IN ({placeholders}) AND updated >= ?',
+            (*chunk, not_before),
+        ).fetchall())
+    return prices
+
+def read_cached_price(symbol: str, not_before: float) -> float | None:
+    """The cached price for a symbol if it was fetched at or after the epoch time not_before."""
+    conn = get_connection()
+    row = conn.execute(
+        'SELECT price FROM price_cache WHERE symbol = ? AND updated >= ?', (symbol, not_before)
+    ).fetchone()
+    return row[0] if row else None
@@ -0,0 +1,127 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from database import write_logs
+
+MAX_QUEUE_SIZE = 10_000
+MAX_BATCH_SIZE = 500
+FLUSH_INTERVAL_SECONDS = 0.5
+
+
+@dataclass
+class LogWriterMetrics:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0
+    failed: int = 0
+    batches: int = 0
+    max_queue_depth: int = 0
+    total_delay_seconds: float = 0.0
+    max_delay_seconds: float = 0.0
+
+    @property
+    def mean_delay_seconds(self) -> float:
+        return self.total_delay_seconds / self.written if self.written else 0.0
+
+
+class BatchLogWriter:
+    """
+    Buffers log records in a bounded queue and writes them to the logs table from a
+    background thread, in batches of up to max_batch_size rows per transaction.
+
+    write() never blocks the caller: if the queue is full the record is dropped and
+    counted in metrics. The queue is flushed every flush_interval seconds, or sooner
+    once a full batch is waiting.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = MAX_QUEUE_SIZE,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ):
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.metrics = LogWriterMetrics()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def write(self, name: str, type: str, message: str) -> bool:
+        """Queue a log entry, returning False if it was dropped because the queue is full."""
+        self._ensure_started()
+        when = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self._queue.put_nowait((name, when, type, message, time.monotonic()))
+        except queue.Full:
+            self.metrics.dropped += 1
+            return False
+        self.metrics.enqueued += 1
+        depth = self._queue.qsize()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, depth)
+        if depth >= self.max_batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> None:
+        """Write everything queued so far before returning."""
+        self._drain()
+
+    def shutdown(self) -> None:
+        """Stop the background thread and write any remaining records."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._drain()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        # Taking and writing each batch under one lock means that once flush() holds the
+        # lock, nothing enqueued earlier can still be in flight in the background thread
+        with self._write_lock:
+            while True:
+                batch = []
+                while len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return
+                self._write_batch(batch)
+
+    def _write_batch(self, batch) -> None:
+        try:
+            write_logs([record[:4] for record in batch])
+        except sqlite3.Error as e:
+            print(f"Failed to write {len(batch)} log records: {e}")
+            self.metrics.failed += len(batch)
+            return
+        now = time.monotonic()
+        delays = [now - record[4] for record in batch]
+        self.metrics.written += len(batch)
+        self.metrics.batches += 1
+        self.metrics.total_delay_seconds += sum(delays)
+        self.metrics.max_delay_seconds = max(self.metrics.max_delay_seconds, max(delays))
@@ -1,9 +1,20 @@
 from polygon import RESTClient
 from dotenv import load_dotenv
 import os
+import time
 from datetime import datetime
 import random
-from database import write_market, read_market
+from database import (
+    write_market,
+    read_market,
+    has_market,
+    read_market_price,
+    read_market_prices,
+    write_cached_price,
+    write_cached_prices,
+    read_cached_price,
+    read_cached_prices,
+)
 from functools import lru_cache
 from datetime import timezone
 
@@ -16,15 +27,25 @@ is_paid_polygon = polygon_plan == "paid"
 is_realtime_polygon = polygon_plan == "realtime"
 
 
+# Prices are cached in accounts.db so that the accounts server, the market server and the
+# dashboard share one copy; the snapshot path (paid plan only) re-fetches after PRICE_CACHE_TTL_SECONDS
+
+PRICE_CACHE_TTL_SECONDS = float(os.getenv("PRICE_CACHE_TTL_SECONDS", "60"))
+
+
+@lru_cache(maxsize=1)
+def get_client() -> RESTClient:
+    return RESTClient(polygon_api_key)
+
+
 def is_market_open() -> bool:
-    client = RESTClient(polygon_api_key)
-    market_status = client.get_market_status()
+    market_status = get_client().get_market_status()
     return market_status.market == "open"
 
 
 def get_all_share_prices_polygon_eod() -> dict[str, float]:
     """With much thanks to student Reema R. for fixing the timezone issue with this!"""
-    client = RESTClient(polygon_api_key)
+    client = get_client()
 
     probe = client.get_previous_close_agg("SPY")[0]
     last_close = datetime.fromtimestamp(probe.timestamp / 1000, tz=timezone.utc).date()
@@ -33,7 +54,6 @@ def get_all_share_prices_polygon_eod() -> dict[str, float]:
     return {result.ticker: result.close for result in results}
 
 
-@lru_cache(maxsize=2)
 def get_market_for_prior_date(today):
     market_data = read_market(today)
     if not market_data:
@@ -44,14 +64,54 @@ def get_market_for_prior_date(today):
 
 def get_share_price_polygon_eod(symbol) -> float:
     today = datetime.now().date().strftime("%Y-%m-%d")
-    market_data = get_market_for_prior_date(today)
-    return market_data.get(symbol, 0.0)
+    price = read_market_price(today, symbol)
+    if price is None and not has_market(today):
+        price = get_market_for_prior_date(today).get(symbol)
+    return price or 0.0
+
+
+def snapshot_price(snapshot) -> float | None:
+    """The latest minute close from a snapshot, or the previous day's close; None if it has neither"""
+    return (snapshot.min and snapshot.min.close) or (snapshot.prev_day and snapshot.prev_day.close) or None
 
 
 def get_share_price_polygon_min(symbol) -> float:
-    client = RESTClient(polygon_api_key)
-    result = client.get_snapshot_ticker("stocks", symbol)
-    return result.min.close or result.prev_day.close
+    price = read_cached_price(symbol, time.time() - PRICE_CACHE_TTL_SECONDS)
+    if price is None:
+        price = snapshot_price(get_client().get_snapshot_ticker("stocks", symbol))
+        if price is None:
+            raise ValueError(f"No recent price for {symbol} in its snapshot")
+        write_cached_price(symbol, price, time.time())
+    return price
+
+
+def get_share_prices_polygon_eod(symbols: list[str]) -> dict[str, float]:
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    prices = read_market_prices(today, symbols)
+    if len(prices) < len(symbols) and not has_market(today):
+        market_data = get_market_for_prior_date(today)
+        prices = {symbol: market_data[symbol] for symbol in symbols if symbol in market_data}
+    return {symbol: prices.get(symbol) or 0.0 for symbol in symbols}
+
+
+def get_share_prices_polygon_min(symbols: list[str]) -> dict[str, float]:
+    prices = read_cached_prices(symbols, time.time() - PRICE_CACHE_TTL_SECONDS)
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    if missing:
+        snapshots = get_client().get_snapshot_all("stocks", tickers=missing)
+        fetched = {snapshot.ticker: snapshot_price(snapshot) for snapshot in snapshots}
+        fetched = {symbol: price for symbol, price in fetched.items() if price is not None}
+        write_cached_prices(fetched, time.time())
+        prices.update(fetched)
+    # Symbols the bulk snapshot couldn't price are looked up one at a time, falling back as get_share_price does
+    return {symbol: prices[symbol] if symbol in prices else get_share_price(symbol) for symbol in symbols}
+
+
+def get_share_prices_polygon(symbols: list[str]) -> dict[str, float]:
+    if is_paid_polygon:
+        return get_share_prices_polygon_min(symbols)
+    else:
+        return get_share_prices_polygon_eod(symbols)
 
 
 def get_share_price_polygon(symbol) -> float:
@@ -68,3 +128,16 @@ def get_share_price(symbol) -> float:
         except Exception as e:
             print(f"Was not able to use the polygon API due to {e}; using a random number")
     return float(random.randint(1, 100))
+
+
+def get_share_prices(symbols) -> dict[str, float]:
+    """Look up the prices of several symbols at once, with one query or request rather than one per symbol"""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    if polygon_api_key:
+        try:
+            return get_share_prices_polygon(symbols)
+        except Exception as e:
+            print(f"Was not able to look up prices in bulk due to {e}; looking them up one at a time")
+    return {symbol: get_share_price(symbol) for symbol in symbols}
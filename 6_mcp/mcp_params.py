@@ -19,10 +19,14 @@ else:
     market_mcp = {"command": "uv", "args": ["run", "market_server.py"]}
 
 
+# The MCP server for the accounts, shared by the Trader's agent and accounts_client
+
+accounts_mcp = {"command": "uv", "args": ["run", "accounts_server.py"]}
+
 # The full set of MCP servers for the trader: Accounts, Push Notification and the Market
 
 trader_mcp_server_params = [
-    {"command": "uv", "args": ["run", "accounts_server.py"]},
+    accounts_mcp,
     {"command": "uv", "args": ["run", "push_server.py"]},
     market_mcp,
 ]
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import time
+import anyio
+import psutil
+from agents.mcp import MCPServerStdio
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+CLIENT_SESSION_TIMEOUT_SECONDS = 120
+HEALTH_CHECK_AFTER_IDLE_SECONDS = 30
+HEALTH_CHECK_TIMEOUT_SECONDS = 5
+
+# Errors that mean the server process or its pipes have gone away, rather than a failed request
+TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, OSError)
+
+
+class BackgroundServer:
+    """
+    One MCP server, kept connected by a background task of its own, because MCPServerStdio
+    (and the stdio transport under it) must be connected and cleaned up in the same task.
+
+    get() starts the server on first use and hands out the connected MCPServerStdio. A server
+    that has been idle for longer than HEALTH_CHECK_AFTER_IDLE_SECONDS is pinged before it is
+    handed out again, and restarted if the ping fails or its task has ended. The server is tied
+    to the event loop it was started on, and is started afresh when used from another loop.
+    """
+
+    def __init__(self, params: dict, client_session_timeout_seconds: float):
+        self.params = params
+        self.client_session_timeout_seconds = client_session_timeout_seconds
+        self.name = f"{params['command']} {' '.join(params['args'])}"
+        self.starts = 0
+        self.last_startup_seconds = 0.0
+        self.total_startup_seconds = 0.0
+        self.server = None
+        self._task = None
+        self._stop = None
+        self._loop = None
+        self._lock = None
+        self._last_used = 0.0
+
+    async def get(self) -> MCPServerStdio:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self.server = None
+            self._task = None
+        async with self._lock:
+            if self._task is not None and not await self._healthy():
+                await self._shutdown()
+            if self._task is None:
+                await self._start()
+            return self.server
+
+    def used(self) -> None:
+        """Note that the server has just answered, so it needs no ping before the next use."""
+        self._last_used = time.monotonic()
+
+    async def restart(self) -> None:
+        """Stop the server, if running; the next get() starts a new one."""
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._shutdown()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _healthy(self) -> bool:
+        if self._task.done():
+            return False
+        if time.monotonic() - self._last_used < HEALTH_CHECK_AFTER_IDLE_SECONDS:
+            return True
+        try:
+            with anyio.fail_after(HEALTH_CHECK_TIMEOUT_SECONDS):
+                await self.server.session.send_ping()
+        except Exception:
+            return False
+        self.used()
+        return True
+
+    async def _start(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        start = time.perf_counter()
+        self._task = asyncio.create_task(self._run(ready, self._stop))
+        try:
+            self.server = await ready
+        except BaseException:
+            self._task = None
+            raise
+        elapsed = time.perf_counter() - start
+        self.used()
+        self.starts += 1
+        self.last_startup_seconds = elapsed
+        self.total_startup_seconds += elapsed
+
+    async def _run(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        try:
+            async with MCPServerStdio(
+                self.params,
+                cache_tools_list=True,
+                client_session_timeout_seconds=self.client_session_timeout_seconds,
+            ) as server:
+                ready.set_result(server)
+                await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"MCP server {self.name} stopped: {e}")
+        finally:
+            if not ready.done():
+                ready.set_exception(ConnectionError(f"MCP server {self.name} exited during startup"))
+
+    async def _shutdown(self) -> None:
+        if self._task is not None:
+            self._stop.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.server = None
+        self._task = None
+
+
+class MCPServerPool:
+    """
+    Starts each distinct MCP server once per process and shares it between every Trader,
+    keeping it running from one trading cycle to the next.
+
+    Servers are keyed by their params, so stateless servers (accounts, push, market, fetch,
+    search) are shared by all traders, while servers whose params name a trader, like the
+    memory server with its per-trader database, stay separate. The agents use the servers'
+    tools through get_all, and code outside the agents, like accounts_client reading the
+    accounts resources, makes its own requests on the same servers through call.
+    """
+
+    def __init__(self, client_session_timeout_seconds: float = CLIENT_SESSION_TIMEOUT_SECONDS):
+        self.client_session_timeout_seconds = client_session_timeout_seconds
+        self.stats: dict[str, BackgroundServer] = {}
+
+    def _server(self, params: dict) -> BackgroundServer:
+        key = json.dumps(params, sort_keys=True)
+        if key not in self.stats:
+            self.stats[key] = BackgroundServer(params, self.client_session_timeout_seconds)
+        return self.stats[key]
+
+    async def get_all(self, params_list: list[dict]) -> list[MCPServerStdio]:
+        return list(await asyncio.gather(*[self.get(params) for params in params_list]))
+
+    async def get(self, params: dict) -> MCPServerStdio:
+        return await self._server(params).get()
+
+    async def call(self, params: dict, request):
+        """Run request(session) on the server's MCP session, restarting the server and retrying once if it has gone away."""
+        background = self._server(params)
+        for attempt in range(2):
+            server = await background.get()
+            try:
+                result = await request(server.session)
+                background.used()
+                return result
+            except (McpError, *TRANSPORT_ERRORS) as e:
+                if isinstance(e, McpError) and e.error.code != CONNECTION_CLOSED:
+                    raise
+                await background.restart()
+                if attempt:
+                    raise
+
+    async def close(self) -> None:
+        await asyncio.gather(*[server.restart() for server in self.stats.values()])
+
+    def rss_mb(self) -> float:
+        """Resident memory of all the MCP server processes started by this process, in MB."""
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+
+    def report(self) -> str:
+        running = sum(1 for server in self.stats.values() if server.running)
+        lines = [f"MCP server pool: {running} servers, {self.rss_mb():,.0f} MB RSS"]
+        for stats in self.stats.values():
+            lines.append(
+                f"  {stats.name}: {stats.starts} starts, last startup {stats.last_startup_seconds:.2f}s"
+            )
+        return "\n".join(lines)
+
+
+server_pool = MCPServerPool()
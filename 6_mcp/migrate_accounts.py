@@ -0,0 +1,13 @@
+from database import migrate_legacy_accounts
+
+
+def migrate():
+    migrated = migrate_legacy_accounts()
+    if migrated:
+        print(f"Migrated {len(migrated)} accounts: {', '.join(migrated)}")
+    else:
+        print("No accounts to migrate")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import socket
+import threading
+from collections import defaultdict
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Writers (the trading floor, each accounts server) and the dashboard are separate processes,
+# so change notifications go over a localhost UDP port: fire-and-forget for the writers,
+# and one listener in the dashboard that fans them out to every open browser session
+
+NOTIFY_HOST = "127.0.0.1"
+NOTIFY_PORT = int(os.getenv("TRADING_NOTIFY_PORT", "8766"))
+
+COALESCE_SECONDS = 0.1
+FALLBACK_POLL_SECONDS = 30
+
+LOG = "log"
+ACCOUNT = "account"
+
+_sender = None
+
+
+def publish(name: str, kind: str) -> None:
+    """Announce that the logs or the account of the given trader have changed."""
+    global _sender
+    try:
+        if _sender is None:
+            _sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _sender.setblocking(False)
+        _sender.sendto(f"{kind}:{name.lower()}".encode(), (NOTIFY_HOST, NOTIFY_PORT))
+    except OSError:
+        # Nobody listening, or the buffer is full: the dashboard will catch up on the next change
+        pass
+
+
+class ChangeFeed:
+    """
+    Listens for notifications from publish() and delivers them to async subscribers.
+
+    If the port can't be bound (for example a second dashboard is already running), every
+    subscriber falls back to a refresh every FALLBACK_POLL_SECONDS.
+    """
+
+    def __init__(self, host: str = NOTIFY_HOST, port: int = NOTIFY_PORT):
+        self.host = host
+        self.port = port
+        self.available = False
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        try:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.bind((self.host, self.port))
+        except OSError as e:
+            print(f"Unable to listen for changes on {self.host}:{self.port} due to {e}; polling instead")
+            return
+        self.available = True
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                data, _ = self._socket.recvfrom(1024)
+                try:
+                    kind, _, name = data.decode(errors="replace").partition(":")
+                    if kind in (LOG, ACCOUNT):
+                        self._deliver(name, kind)
+                except Exception as e:
+                    # A stray or malformed datagram mustn't take the listener down
+                    print(f"Ignoring change notification {data[:64]!r} due to {e}")
+        except Exception as e:
+            print(f"Stopped listening for changes due to {e}; polling instead")
+        finally:
+            # Switch every subscriber over to polling, waking them with a full refresh
+            self.available = False
+            with self._lock:
+                names = list(self._subscribers)
+            for name in names:
+                self._deliver(name, LOG)
+                self._deliver(name, ACCOUNT)
+
+    def _deliver(self, name: str, kind: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers[name])
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, kind)
+            except RuntimeError:
+                pass  # the session's event loop has closed
+
+    async def subscribe(self, name: str):
+        """
+        Yield the set of change kinds for this trader each time something changes.
+        Bursts arriving within COALESCE_SECONDS are delivered together.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        entry = (loop, queue)
+        with self._lock:
+            self._subscribers[name.lower()].add(entry)
+        try:
+            while True:
+                if self.available:
+                    kinds = {await queue.get()}
+                else:
+                    await asyncio.sleep(FALLBACK_POLL_SECONDS)
+                    kinds = {LOG, ACCOUNT}
+                await asyncio.sleep(COALESCE_SECONDS)
+                while not queue.empty():
+                    kinds.add(queue.get_nowait())
+                yield kinds
+        finally:
+            with self._lock:
+                self._subscribers[name.lower()].discard(entry)
@@ -1,5 +1,5 @@
 from agents import TracingProcessor, Trace, Span
-from database import write_log
+from log_writer import BatchLogWriter
 import secrets
 import string
 
@@ -16,6 +16,10 @@ def make_trace_id(tag: str) -> str:
     return f"trace_{tag}{random_suffix}"
 
 class LogTracer(TracingProcessor):
+    """Writes trace and span events to the logs table through a BatchLogWriter, off the event loop."""
+
+    def __init__(self, writer: BatchLogWriter | None = None):
+        self.writer = writer or BatchLogWriter()
 
     def get_name(self, trace_or_span: Trace | Span) -> str | None:
         trace_id = trace_or_span.trace_id
@@ -28,12 +32,12 @@ class LogTracer(TracingProcessor):
     def on_trace_start(self, trace) -> None:
         name = self.get_name(trace)
         if name:
-            write_log(name, "trace", f"Started: {trace.name}")
+            self.writer.write(name, "trace", f"Started: {trace.name}")
 
     def on_trace_end(self, trace) -> None:
         name = self.get_name(trace)
         if name:
-            write_log(name, "trace", f"Ended: {trace.name}")
+            self.writer.write(name, "trace", f"Ended: {trace.name}")
 
     def on_span_start(self, span) -> None:
         name = self.get_name(span)
@@ -49,7 +53,7 @@ class LogTracer(TracingProcessor):
                     message += f" {span.span_data.server}"
             if span.error:
                 message += f" {span.error}"
-            write_log(name, type, message)
+            self.writer.write(name, type, message)
 
     def on_span_end(self, span) -> None:
         name = self.get_name(span)
@@ -66,10 +70,10 @@ class LogTracer(TracingProcessor):
                     message += f" {span.span_data.server}"
             if span.error:
                 message += f" {span.error}"
-            write_log(name, type, message)
+            self.writer.write(name, type, message)
 
     def force_flush(self) -> None:
-        pass
+        self.writer.flush()
 
     def shutdown(self) -> None:
-        pass
\ No newline at end of file
+        self.writer.shutdown()
\ No newline at end of file
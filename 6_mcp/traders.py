@@ -1,12 +1,10 @@
-from contextlib import AsyncExitStack
 from accounts_client import read_accounts_resource, read_strategy_resource
 from tracers import make_trace_id
 from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
-import json
-from agents.mcp import MCPServerStdio
+from mcp_pool import server_pool
 from templates import (
     researcher_instructions,
     trader_instructions,
@@ -49,6 +47,20 @@ def get_model(model_name: str):
         return model_name
 
 
+def get_provider(model_name: str) -> str:
+    """The API provider serving this model, matching the client chosen by get_model"""
+    if "/" in model_name:
+        return "openrouter"
+    elif "deepseek" in model_name:
+        return "deepseek"
+    elif "grok" in model_name:
+        return "grok"
+    elif "gemini" in model_name:
+        return "gemini"
+    else:
+        return "openai"
+
+
 async def get_researcher(mcp_servers, model_name) -> Agent:
     researcher = Agent(
         name="Researcher",
@@ -84,10 +96,7 @@ class Trader:
         return self.agent
 
     async def get_account_report(self) -> str:
-        account = await read_accounts_resource(self.name)
-        account_json = json.loads(account)
-        account_json.pop("portfolio_value_time_series", None)
-        return json.dumps(account_json)
+        return await read_accounts_resource(self.name)
 
     async def run_agent(self, trader_mcp_servers, researcher_mcp_servers):
         self.agent = await self.create_agent(trader_mcp_servers, researcher_mcp_servers)
@@ -101,21 +110,9 @@ class Trader:
         await Runner.run(self.agent, message, max_turns=MAX_TURNS)
 
     async def run_with_mcp_servers(self):
-        async with AsyncExitStack() as stack:
-            trader_mcp_servers = [
-                await stack.enter_async_context(
-                    MCPServerStdio(params, client_session_timeout_seconds=120)
-                )
-                for params in trader_mcp_server_params
-            ]
-            async with AsyncExitStack() as stack:
-                researcher_mcp_servers = [
-                    await stack.enter_async_context(
-                        MCPServerStdio(params, client_session_timeout_seconds=120)
-                    )
-                    for params in researcher_mcp_server_params(self.name)
-                ]
-                await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
+        trader_mcp_servers = await server_pool.get_all(trader_mcp_server_params)
+        researcher_mcp_servers = await server_pool.get_all(researcher_mcp_server_params(self.name))
+        await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
 
     async def run_with_trace(self):
         trace_name = f"{self.name}-trading" if self.do_trade else f"{self.name}-rebalancing"
@@ -1,7 +1,12 @@
-from traders import Trader
+from traders import Trader, get_provider
 from typing import List
 import asyncio
+import math
+import random
+from collections import defaultdict
+from dataclasses import dataclass
 from tracers import LogTracer
+from mcp_pool import server_pool
 from agents import add_trace_processor
 from market import is_market_open
 from dotenv import load_dotenv
@@ -14,6 +19,10 @@ RUN_EVEN_WHEN_MARKET_IS_CLOSED = (
     os.getenv("RUN_EVEN_WHEN_MARKET_IS_CLOSED", "false").strip().lower() == "true"
 )
 USE_MANY_MODELS = os.getenv("USE_MANY_MODELS", "false").strip().lower() == "true"
+MAX_CONCURRENT_PER_PROVIDER = int(os.getenv("MAX_CONCURRENT_PER_PROVIDER", "2"))
+STAGGER_SECONDS = float(os.getenv("STAGGER_SECONDS", "15"))
+JITTER_SECONDS = float(os.getenv("JITTER_SECONDS", "5"))
+TRADER_DEADLINE_MINUTES = float(os.getenv("TRADER_DEADLINE_MINUTES", str(RUN_EVERY_N_MINUTES)))
 
 names = ["Warren", "George", "Ray", "Cathie"]
 lastnames = ["Patience", "Bold", "Systematic", "Crypto"]
@@ -38,15 +47,136 @@ def create_traders() -> List[Trader]:
     return traders
 
 
+@dataclass
+class RunMetrics:
+    trader: str
+    provider: str
+    lateness_seconds: float
+    queued_seconds: float
+    duration_seconds: float
+    timed_out: bool
+
+    def __str__(self):
+        status = "timed out" if self.timed_out else "finished"
+        return (
+            f"{self.trader} ({self.provider}) {status}: started {self.lateness_seconds:.1f}s after "
+            f"its slot, queued {self.queued_seconds:.1f}s, ran {self.duration_seconds:.1f}s"
+        )
+
+
+class TradingScheduler:
+    """
+    Runs each trader on its own fixed schedule rather than all at once.
+
+    Trader i's slots are at start + i * stagger + k * interval, plus up to jitter seconds of
+    random delay, so slots never drift however long a run takes; a run that overruns simply
+    skips the slots it missed. Runs share a semaphore per API provider and are cancelled at
+    their deadline, so one slow trader can't hold up the others. Whether the market is open
+    is checked once per interval, and a slot that fails is skipped rather than stopping the
+    trader.
+    """
+
+    def __init__(
+        self,
+        traders: List[Trader],
+        interval_seconds: float = RUN_EVERY_N_MINUTES * 60,
+        stagger_seconds: float = STAGGER_SECONDS,
+        jitter_seconds: float = JITTER_SECONDS,
+        deadline_seconds: float = TRADER_DEADLINE_MINUTES * 60,
+        max_concurrent_per_provider: int = MAX_CONCURRENT_PER_PROVIDER,
+    ):
+        self.traders = traders
+        self.interval_seconds = interval_seconds
+        self.stagger_seconds = stagger_seconds
+        self.jitter_seconds = jitter_seconds
+        self.deadline_seconds = deadline_seconds
+        self.semaphores = defaultdict(lambda: asyncio.Semaphore(max_concurrent_per_provider))
+        self.history: list[RunMetrics] = []
+        self.market_checks: dict[int, asyncio.Future] = {}
+
+    async def run_forever(self):
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(
+            *[
+                self.run_trader(trader, start + index * self.stagger_seconds)
+                for index, trader in enumerate(self.traders)
+            ]
+        )
+
+    async def run_trader(self, trader: Trader, first_slot: float):
+        loop = asyncio.get_running_loop()
+        slot = first_slot
+        while True:
+            await asyncio.sleep(max(0.0, slot + random.uniform(0, self.jitter_seconds) - loop.time()))
+            interval = round((slot - first_slot) / self.interval_seconds)
+            try:
+                if RUN_EVEN_WHEN_MARKET_IS_CLOSED or await self.market_open(interval):
+                    metrics = await self.run_once(trader, slot)
+                    self.history.append(metrics)
+                    print(metrics)
+                else:
+                    print(f"Market is closed, skipping run for {trader.name}")
+            except Exception as e:
+                print(f"Error in the slot for {trader.name}, skipping it: {e}")
+            missed = math.floor((loop.time() - first_slot) / self.interval_seconds) + 1
+            slot = first_slot + missed * self.interval_seconds
+
+    async def market_open(self, interval: int) -> bool:
+        """
+        Whether the market is open, asked of Polygon once for each interval and shared by every
+        trader's slot in it. A failed check isn't kept, so the next slot asks again.
+        """
+        if interval not in self.market_checks:
+            self.market_checks = {
+                i: check for i, check in self.market_checks.items() if i >= interval - 1
+            }
+            self.market_checks[interval] = asyncio.ensure_future(asyncio.to_thread(is_market_open))
+        check = self.market_checks[interval]
+        try:
+            return await asyncio.shield(check)
+        except Exception:
+            if self.market_checks.get(interval) is check:
+                del self.market_checks[interval]
+            raise
+
+    async def run_once(self, trader: Trader, slot: float) -> RunMetrics:
+        loop = asyncio.get_running_loop()
+        provider = get_provider(trader.model_name)
+        queued_at = loop.time()
+        async with self.semaphores[provider]:
+            started = loop.time()
+            try:
+                await asyncio.wait_for(trader.run(), timeout=self.deadline_seconds)
+                timed_out = False
+            except asyncio.TimeoutError:
+                timed_out = True
+        return RunMetrics(
+            trader=trader.name,
+            provider=provider,
+            lateness_seconds=started - slot,
+            queued_seconds=started - queued_at,
+            duration_seconds=loop.time() - started,
+            timed_out=timed_out,
+        )
+
+
 async def run_every_n_minutes():
-    add_trace_processor(LogTracer())
+    tracer = LogTracer()
+    add_trace_processor(tracer)
     traders = create_traders()
+    scheduler = TradingScheduler(traders)
+    reporter = asyncio.create_task(report_every_n_minutes(tracer))
+    try:
+        await scheduler.run_forever()
+    finally:
+        reporter.cancel()
+
+
+async def report_every_n_minutes(tracer: LogTracer):
     while True:
-        if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
-            await asyncio.gather(*[trader.run() for trader in traders])
-        else:
-            print("Market is closed, skipping run")
         await asyncio.sleep(RUN_EVERY_N_MINUTES * 60)
+        print(f"Log writer: {tracer.writer.metrics}")
+        print(server_pool.report())
 
 
 if __name__ == "__main__":